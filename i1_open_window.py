@@ -22,20 +22,836 @@ open_window_notification:
     below: "Close bedroom window"
     above: "Open bedroom window"
     title: "Bedroom temp"
-    cooldown: 1800
+    cooldown: 1800       # Or per condition: {below: 3600, above: 1800}
   when:
     after: 15
     before: 22
   nowcast_sensor: sensor.met_nowcast_precipitation  # Optional: MET.no nowcast precipitation sensor
+  nowcast_cache_ttl: 300 # Optional: fallback lifetime (seconds) of a cached precipitation result
+  notify_group: family   # Optional: notify group covering every person, used when all of them are eligible
+  digest_window: 10      # Optional: seconds to collect alerts from several rooms into one notification
+  actions: [ignore, snooze, acknowledge]  # Optional: action buttons (ignore, snooze, mute, acknowledge)
+  snooze_minutes: 30     # Optional: how long the snooze action silences a room
+  notify_workers: 4      # Optional: concurrent notify calls per alert
+  notify_timeout: 10     # Optional: seconds to wait for notify calls before logging them as pending
+  retry:                 # Optional: retries of failed notify calls
+    max_attempts: 4
+    base_delay: 30
+    max_delay: 900
+    queue_size: 50
+  circuit_breaker:       # Optional: stop calling a notify service after repeated failures
+    failure_threshold: 3
+    reset_timeout: 300
+  store:                 # Optional: durable cooldowns and ignores ("store: false" keeps them in memory only)
+    path: /config/appdaemon/i1_open_window.sqlite
+    flush_interval: 60
+  mode: event            # Optional: "poll" (default) or "event"
+  safety_interval: 900   # Optional: seconds between safety-net checks in event mode
+  check_interval:        # Optional: bounds for the adaptive check interval in poll mode
+    min: 60
+    max: 600
+
+AsyncTemperatureWindowNotification takes the same configuration and runs its callbacks on
+AppDaemon's event loop instead of worker threads.
+
+Several rooms can be evaluated by one app instance with a rooms list. Each room takes
+its own temperature, window and messages sections, falling back to the top-level ones:
+
+household_window_notification:
+  module: i1_open_window
+  class: TemperatureWindowNotification
+  persons: [...]
+  when: {after: 15, before: 22}
+  temperature: {below: 16, above: 20}
+  window: {below: "off", above: "on"}
+  messages: {title: "Room temp", cooldown: 1800}
+  rooms:
+    - name: Bedroom
+      temperature: {sensor: sensor.bedroom_temperature}
+      window: {sensor: binary_sensor.bedroom_window}
+      messages: {below: "Close bedroom window", above: "Open bedroom window"}
+    - name: Kitchen
+      temperature: {sensor: sensor.kitchen_temperature, below: 18}
+      window: {sensor: binary_sensor.kitchen_window}
+      messages: {below: "Close kitchen window", above: "Open kitchen window"}
 """
 
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import sqlite3
+import threading
 import time
 import traceback
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import closing
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from functools import partial
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 
 import appdaemon.plugins.hass.hassapi as hass
 
+# Assumed worst-case temperature drift (°C per second) when the measured slope is flat or moving away
+ASSUMED_DRIFT = 1.0 / 900
+# Fraction of the estimated time-to-threshold to sleep before checking again
+CADENCE_SAFETY_FACTOR = 0.5
+# Alert conditions: temperature below the lower threshold or above the upper one
+CONDITIONS = ("below", "above")
+# Notification action buttons the app can offer
+ACTIONS = ("ignore", "snooze", "mute", "acknowledge")
+# How far ahead (seconds) the nowcast forecast is checked for precipitation
+PRECIPITATION_HORIZON = 1800
+# Companion app message that removes the notification carrying the given tag
+CLEAR_NOTIFICATION = "clear_notification"
+# Up to this many watched entities are read one by one; beyond it one uncopied read of the whole namespace is cheaper
+SNAPSHOT_ENTITY_READS = 8
+
+
+class _RoomResult:
+    """Outcome of a room's latest evaluation; replaced as a whole, never changed in place."""
+
+    __slots__ = ("temperature", "slope", "last_reading", "active_condition", "rain_suppressed")
+
+    def __init__(self, temperature: Optional[float] = None, slope: float = 0.0,
+                 last_reading: Optional[Tuple[float, float]] = None, active_condition: Optional[str] = None,
+                 rain_suppressed: bool = False):
+        self.temperature = temperature
+        self.slope = slope
+        self.last_reading = last_reading
+        self.active_condition = active_condition
+        self.rain_suppressed = rain_suppressed
+
+    def advance(self, now: float, temperature: Optional[float], condition: Optional[str], rain_suppressed: bool) -> "_RoomResult":
+        """Return the result following this one, updating the smoothed slope (°C per second) from a new reading."""
+        if temperature is None:
+            return _RoomResult(None, self.slope, self.last_reading)
+        slope = self.slope
+        if self.last_reading is not None:
+            last_time, last_temperature = self.last_reading
+            elapsed = now - last_time
+            if elapsed > 0:
+                slope = 0.5 * slope + 0.5 * (temperature - last_temperature) / elapsed
+        return _RoomResult(temperature, slope, (now, temperature), condition, rain_suppressed)
+
+
+class _Room:
+    """Configuration of one monitored room and the result of its latest evaluation.
+
+    The result is published as one _RoomResult through _AppState.publish, so readers never see
+    a half-finished evaluation; read room.result once when several of its fields must agree.
+    """
+
+    __slots__ = (
+        "name", "key", "temperature_sensor", "window_sensor", "below", "above", "window_below", "window_above",
+        "message_below", "message_above", "title", "cooldown_below", "cooldown_above", "result",
+    )
+
+    def __init__(self, name: str, temperature: Dict[str, Any], window: Dict[str, Any], messages: Dict[str, Any]):
+        self.name = name
+        self.key = re.sub(r"[^a-z0-9_]", "_", name.lower())
+        self.temperature_sensor: str = temperature["sensor"]
+        self.below: float = temperature["below"]
+        self.above: float = temperature["above"]
+        self.window_sensor: str = window["sensor"]
+        self.window_below = window["below"] == "on"
+        self.window_above = window["above"] == "on"
+        self.message_below: str = messages["below"]
+        self.message_above: str = messages["above"]
+        self.title: str = messages["title"]
+        self.cooldown_below: int = messages["cooldown"]["below"]
+        self.cooldown_above: int = messages["cooldown"]["above"]
+        self.result = _RoomResult()
+
+    @property
+    def active_condition(self) -> Optional[str]:
+        """Alert condition found by the latest evaluation, if any."""
+        return self.result.active_condition
+
+
+class _Delivery:
+    """One notify service call and the cooldowns it starts once delivered.
+
+    cooldowns maps each (room key, notify service, condition) key the delivery stands for to
+    its cooldown in seconds; a digest or group delivery carries several keys. A digest also
+    carries the alerts it lists, which it shows once delivered. title is None for calls that
+    show nothing, such as clear_notification.
+    """
+
+    __slots__ = ("service", "message", "data", "cooldowns", "alerts", "title", "attempts")
+
+    def __init__(self, service: str, message: str, data: Dict[str, Any], cooldowns: Dict[Tuple[str, str, str], int],
+                 alerts: Optional[List["_Alert"]] = None, title: Optional[str] = None):
+        self.service = service
+        self.message = message
+        self.data = data
+        self.cooldowns = cooldowns
+        self.alerts = alerts or []
+        self.title = title
+        # Failed attempts so far
+        self.attempts = 0
+
+
+class _Alert:
+    """One room's alert line waiting to be delivered to one notify service."""
+
+    __slots__ = ("room", "line", "key", "cooldown")
+
+    def __init__(self, room: "_Room", line: str, key: Tuple[str, str, str], cooldown: int):
+        self.room = room
+        self.line = line
+        self.key = key
+        self.cooldown = cooldown
+
+
+class _CircuitBreaker:
+    """Closed/open/half-open circuit breaker guarding one notify service.
+
+    Closed lets every call through. After failure_threshold consecutive failures it opens and
+    rejects calls for reset_timeout seconds, then lets a single probe through (half-open); the
+    probe's outcome closes or re-opens it. Calls arriving while the probe is in flight are parked
+    until it finishes.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: int):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._parked: List[Any] = []
+        self._lock = threading.Lock()
+
+    @property
+    def retry_at(self) -> float:
+        """Time at which an open breaker lets a probe through."""
+        return self.opened_at + self.reset_timeout
+
+    def rejects(self, now: float) -> bool:
+        """Return True if a call made now would be rejected, without changing state."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return now < self.retry_at
+            return self.state == self.HALF_OPEN and self._probing
+
+    def allow(self, now: float) -> bool:
+        """Return True if a call may be made now, moving an expired open breaker to half-open."""
+        with self._lock:
+            if self.state == self.OPEN and now >= self.retry_at:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def park(self, item: Any) -> bool:
+        """Hold item until the probe in flight finishes; return False (holding nothing) if no probe is in flight."""
+        with self._lock:
+            if self.state != self.HALF_OPEN or not self._probing:
+                return False
+            self._parked.append(item)
+            return True
+
+    def take_parked(self) -> List[Any]:
+        """Return and forget the items parked while the probe was in flight."""
+        with self._lock:
+            parked, self._parked = self._parked, []
+            return parked
+
+    def record_success(self) -> bool:
+        """Record a successful call; return True if this closed the breaker."""
+        with self._lock:
+            changed = self.state != self.CLOSED
+            self.state, self.failures, self._probing = self.CLOSED, 0, False
+            return changed
+
+    def record_failure(self, now: float) -> bool:
+        """Record a failed call; return True if this opened the breaker."""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                self.state, self.opened_at = self.OPEN, now
+                return True
+            return False
+
+
+class _ExpiryHeap:
+    """Expiry times per key, ordered in a heap with lazy deletion and bounded to a fixed key set.
+
+    Keys outside allowed_keys are rejected, expired entries are evicted as time passes, and the
+    heap top is always a live entry, so the earliest expiry is available in O(1).
+    """
+
+    def __init__(self, allowed_keys: Iterable[Tuple[str, ...]]):
+        self.allowed_keys = frozenset(allowed_keys)
+        self._expiries: Dict[Tuple[str, ...], float] = {}
+        self._heap: List[Tuple[float, Tuple[str, ...]]] = []
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def get(self, key: Tuple[str, ...], default: float = 0.0) -> float:
+        """Return the expiry stored for key, or default."""
+        return self._expiries.get(key, default)
+
+    def set(self, key: Tuple[str, ...], expiry: float) -> bool:
+        """Store expiry for key; return False (and store nothing) if key is not allowed."""
+        if key not in self.allowed_keys:
+            return False
+        self._expiries[key] = expiry
+        heapq.heappush(self._heap, (expiry, key))
+        if len(self._heap) > 2 * len(self._expiries) + 16:
+            # Too many superseded entries: rebuild from the live ones
+            self._heap = [(expiry, key) for key, expiry in self._expiries.items()]
+            heapq.heapify(self._heap)
+        self._drop_stale()
+        return True
+
+    def evict_expired(self, now: float):
+        """Remove every entry that has expired by now."""
+        while self._heap and self._heap[0][0] <= now:
+            expiry, key = heapq.heappop(self._heap)
+            if self._expiries.get(key) == expiry:
+                del self._expiries[key]
+        self._drop_stale()
+
+    def next_expiry(self, now: float) -> Optional[float]:
+        """Return the earliest expiry after now, or None if nothing is pending."""
+        self.evict_expired(now)
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        """Pop heap entries superseded by a later set for the same key."""
+        while self._heap and self._expiries.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+
+class _AppState:
+    """Mutable state of one app instance, shared by callbacks that may run on different worker threads.
+
+    Every read-modify-write runs under one re-entrant lock, so the app can run unpinned without
+    lost updates. claim checks and reserves a cooldown key in one step, so two concurrent passes
+    cannot both send the same alert.
+    """
+
+    def __init__(self, cooldowns: _ExpiryHeap):
+        self._lock = threading.RLock()
+        # Expiry per (room key, notify service, condition) of cooldowns, ignores, snoozes and mutes
+        self._cooldowns = cooldowns
+        # Cooldown keys of deliveries whose notify call has not finished yet
+        self._in_flight: set = set()
+        # Cooldown keys held by an "Acknowledge" tap until their condition resolves
+        # (the expiry the acknowledgement set, so a later ignore, snooze or mute is never undone)
+        self._acknowledged: Dict[Tuple[str, str, str], float] = {}
+        # Notify services currently showing a notification, per tag
+        self._posted: Dict[str, set] = {}
+        # Alerts listed by the digest each notify service currently shows, per (room key, condition)
+        self._digests_shown: Dict[str, Dict[Tuple[str, str], _Alert]] = {}
+        # Alerts collected per notify service until the digest window closes
+        self._digest: Dict[str, List[_Alert]] = {}
+        # Scheduler handles by name
+        self._timers: Dict[str, Any] = {}
+
+    def publish(self, room: "_Room", now: float, temperature: Optional[float], condition: Optional[str],
+                rain_suppressed: bool) -> _RoomResult:
+        """Replace the room's result by the outcome of a new evaluation and return the result it replaces.
+
+        Concurrent evaluations of one room are ordered here, so each sees the transition from the
+        result published just before it.
+        """
+        with self._lock:
+            previous = room.result
+            room.result = previous.advance(now, temperature, condition, rain_suppressed)
+            return previous
+
+    def cooldown_count(self) -> int:
+        """Return the number of unexpired cooldown entries."""
+        with self._lock:
+            return len(self._cooldowns)
+
+    def knows(self, keys: Iterable[Tuple[str, str, str]]) -> bool:
+        """Return True if every key is a configured cooldown key."""
+        return all(key in self._cooldowns.allowed_keys for key in keys)
+
+    def set_expiry(self, key: Tuple[str, str, str], expiry: float) -> bool:
+        """Block key until expiry; return False (and store nothing) if key is not allowed."""
+        with self._lock:
+            return self._cooldowns.set(key, expiry)
+
+    def next_expiry(self, now: float) -> Optional[float]:
+        """Return the earliest cooldown expiry after now, or None if nothing is pending."""
+        with self._lock:
+            return self._cooldowns.next_expiry(now)
+
+    def blocked(self, keys: Iterable[Tuple[str, str, str]], now: float) -> bool:
+        """Return True if every key is cooling down or already in flight."""
+        with self._lock:
+            return all(self._cooldowns.get(key, 0) > now or key in self._in_flight for key in keys)
+
+    def claim(self, key: Tuple[str, str, str], now: float) -> bool:
+        """Mark key in flight and return True, unless it is cooling down or already in flight."""
+        with self._lock:
+            if self._cooldowns.get(key, 0) > now or key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+            return True
+
+    def mark_in_flight(self, keys: Iterable[Tuple[str, str, str]]):
+        """Mark keys as belonging to an unfinished delivery."""
+        with self._lock:
+            self._in_flight.update(keys)
+
+    def release(self, keys: Iterable[Tuple[str, str, str]]):
+        """Forget that keys belong to an unfinished delivery."""
+        with self._lock:
+            self._in_flight.difference_update(keys)
+
+    def collect(self, service: str, alerts: List[_Alert]) -> bool:
+        """Add alerts to the digest; return True if they are the first since it was last taken."""
+        with self._lock:
+            first = not self._digest
+            self._digest.setdefault(service, []).extend(alerts)
+            return first
+
+    def withdraw(self, room_key: str, condition: str):
+        """Drop the collected alerts for a room's condition and release their in-flight keys."""
+        with self._lock:
+            for service, alerts in list(self._digest.items()):
+                stale = [alert for alert in alerts if alert.room.key == room_key and alert.key[2] == condition]
+                if not stale:
+                    continue
+                self._in_flight.difference_update(alert.key for alert in stale)
+                keep = [alert for alert in alerts if alert not in stale]
+                if keep:
+                    self._digest[service] = keep
+                else:
+                    del self._digest[service]
+
+    def take_digest(self) -> Dict[str, List[_Alert]]:
+        """Return the collected alerts and start a new digest."""
+        with self._lock:
+            digest, self._digest = self._digest, {}
+            return digest
+
+    def add_posted(self, tag: str, service: str):
+        """Record that service shows the notification carrying tag."""
+        with self._lock:
+            self._posted.setdefault(tag, set()).add(service)
+
+    def is_posted(self, tag: str) -> bool:
+        """Return True if any service shows the notification carrying tag."""
+        with self._lock:
+            return bool(self._posted.get(tag))
+
+    def pop_posted(self, tag: str) -> set:
+        """Return and forget the services showing the notification carrying tag."""
+        with self._lock:
+            return self._posted.pop(tag, set())
+
+    def discard_posted(self, tag: str, service: str) -> bool:
+        """Forget that service shows the notification carrying tag; return False if it did not."""
+        with self._lock:
+            services = self._posted.get(tag, set())
+            if service not in services:
+                return False
+            services.discard(service)
+            if not services:
+                del self._posted[tag]
+            return True
+
+    def show_digest(self, service: str, alerts: List[_Alert]):
+        """Record the alerts listed by the digest service now shows."""
+        with self._lock:
+            self._digests_shown[service] = {(alert.room.key, alert.key[2]): alert for alert in alerts}
+
+    def shown_digest(self, service: str) -> List[_Alert]:
+        """Return the alerts listed by the digest service shows, if any."""
+        with self._lock:
+            return list(self._digests_shown.get(service, {}).values())
+
+    def resolve_in_digests(self, room_key: str, condition: str) -> Dict[str, List[_Alert]]:
+        """Drop a resolved room condition from every shown digest; return the remaining alerts per affected service."""
+        with self._lock:
+            remaining = {}
+            for service, shown in list(self._digests_shown.items()):
+                if shown.pop((room_key, condition), None) is None:
+                    continue
+                remaining[service] = list(shown.values())
+                if not shown:
+                    del self._digests_shown[service]
+            return remaining
+
+    def acknowledge(self, keys: Iterable[Tuple[str, str, str]], expiry: float):
+        """Record keys held by an acknowledgement until expiry."""
+        with self._lock:
+            self._acknowledged.update((key, expiry) for key in keys)
+
+    def drop_acknowledged(self, keys: Iterable[Tuple[str, str, str]]):
+        """Forget acknowledgements of keys whose expiry another action has replaced."""
+        with self._lock:
+            for key in keys:
+                self._acknowledged.pop(key, None)
+
+    def release_acknowledged(self, room_key: str, condition: str) -> List[Tuple[str, str, str]]:
+        """Lift and return the acknowledged keys of a room's condition that are still held by their acknowledgement."""
+        with self._lock:
+            keys = [key for key in self._acknowledged if key[0] == room_key and key[2] == condition]
+            released = []
+            for key in keys:
+                if self._cooldowns.get(key) == self._acknowledged.pop(key):
+                    self._cooldowns.set(key, 0)
+                    released.append(key)
+            return released
+
+    def timer_count(self) -> int:
+        """Return the number of timer handles held."""
+        with self._lock:
+            return len(self._timers)
+
+    def get_timer(self, name: str) -> Any:
+        """Return the timer handle held under name, or None."""
+        with self._lock:
+            return self._timers.get(name)
+
+    def put_timer(self, name: str, handle: Any) -> Any:
+        """Hold handle under name and return the handle it replaces, or None."""
+        with self._lock:
+            previous = self._timers.get(name)
+            self._timers[name] = handle
+            return previous
+
+    def pop_timer(self, name: str, expected: Any = None) -> Any:
+        """Forget and return the handle held under name; with expected, only if that is the handle held."""
+        with self._lock:
+            if expected is not None and self._timers.get(name) is not expected:
+                return None
+            return self._timers.pop(name, None)
+
+    def replace_timer(self, name: str, expected: Any, handle: Any):
+        """Hold handle under name instead of expected, if expected is still the handle held."""
+        with self._lock:
+            if self._timers.get(name) is expected:
+                self._timers[name] = handle
+
+
+class _ExpiryStore:
+    """SQLite file holding cooldown and ignore expiries per app, written behind in batches.
+
+    Updates are only buffered by put; flush writes everything buffered in one transaction.
+    A connection is opened per call, so the store can be used from any worker thread.
+    """
+
+    def __init__(self, path: str, app_name: str):
+        self.path = path
+        self.app_name = app_name
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def load(self, now: float) -> Dict[Tuple[str, ...], float]:
+        """Return this app's unexpired entries and drop its expired ones from the file."""
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS expiries (app TEXT, key TEXT, expires REAL, PRIMARY KEY (app, key))")
+            connection.execute("DELETE FROM expiries WHERE app = ? AND expires <= ?", (self.app_name, now))
+            rows = connection.execute("SELECT key, expires FROM expiries WHERE app = ?", (self.app_name,)).fetchall()
+        return {tuple(key.split("|")): expires for key, expires in rows}
+
+    def put(self, key: Tuple[str, ...], expires: float):
+        """Buffer an expiry for the next flush."""
+        with self._lock:
+            self._pending["|".join(key)] = expires
+
+    def flush(self) -> int:
+        """Write all buffered expiries in one transaction and return how many were written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            with closing(sqlite3.connect(self.path)) as connection, connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO expiries (app, key, expires) VALUES (?, ?, ?)",
+                    [(self.app_name, key, expires) for key, expires in pending.items()])
+        except sqlite3.Error:
+            # Keep the batch for the next flush, without overwriting anything buffered since
+            with self._lock:
+                self._pending = dict(pending, **self._pending)
+            raise
+        return len(pending)
+
+
+class _StateSnapshot:
+    """Point-in-time view of the entities an evaluation pass reads, taken once at the start of the pass."""
+
+    __slots__ = ("taken_at", "precipitation", "_states")
+
+    def __init__(self, states: Any, entities: frozenset):
+        self.taken_at = time.time()
+        # Memoised result of the precipitation check for this pass
+        self.precipitation: Optional[bool] = None
+        if not isinstance(states, dict):
+            states = {}
+        self._states: Dict[str, Dict[str, Any]] = {
+            entity: states[entity] for entity in entities if isinstance(states.get(entity), dict)
+        }
+
+    def state(self, entity_id: str) -> Any:
+        """Return the state of entity_id, or None if it is unknown."""
+        entry = self._states.get(entity_id)
+        return entry.get("state") if entry else None
+
+    def attribute(self, entity_id: str, attribute: str) -> Any:
+        """Return one attribute of entity_id, or None if it is unknown."""
+        entry = self._states.get(entity_id)
+        return (entry.get("attributes") or {}).get(attribute) if entry else None
+
+
+class _NowcastTimeline:
+    """Nowcast forecast parsed once into sorted epoch and precipitation arrays for bisect lookups."""
+
+    __slots__ = ("source", "times", "precipitation", "_wet_count", "_last_wet", "_next_wet")
+
+    def __init__(self, forecast: List[Dict[str, Any]]):
+        self.source = forecast
+        slots = []
+        for entry in forecast:
+            try:
+                # Aware timestamps keep their offset; naive ones are taken as local time
+                dt = datetime.fromisoformat(entry["datetime"].replace("Z", "+00:00"))
+                slots.append((dt.timestamp(), float(entry["precipitation"])))
+            except Exception:
+                continue
+        slots.sort()
+        self.times = [slot_time for slot_time, _ in slots]
+        self.precipitation = [precip for _, precip in slots]
+
+        # Prefix counts of wet slots and the index of the latest wet slot, both over the first i slots
+        self._wet_count = [0]
+        self._last_wet = [-1]
+        for i, precip in enumerate(self.precipitation):
+            self._wet_count.append(self._wet_count[-1] + (precip > 0))
+            self._last_wet.append(i if precip > 0 else self._last_wet[-1])
+        # Index of the earliest wet slot at or after slot i (len(times) if there is none)
+        self._next_wet = [len(self.times)] * (len(self.times) + 1)
+        for i in range(len(self.times) - 1, -1, -1):
+            self._next_wet[i] = i if self.precipitation[i] > 0 else self._next_wet[i + 1]
+
+    def wet_between(self, start: float, end: float) -> bool:
+        """Return True if any forecast slot in [start, end] has precipitation."""
+        lo, hi = bisect_left(self.times, start), bisect_right(self.times, end)
+        return self._wet_count[hi] - self._wet_count[lo] > 0
+
+    def next_wet_after(self, when: float) -> Optional[float]:
+        """Return the start of the first wet forecast slot after when, if any."""
+        i = self._next_wet[bisect_right(self.times, when)]
+        return self.times[i] if i < len(self.times) else None
+
+    def next_slot_after(self, when: float) -> Optional[float]:
+        """Return the start of the first forecast slot after when, if any."""
+        i = bisect_right(self.times, when)
+        return self.times[i] if i < len(self.times) else None
+
+    def clear_at(self, start: float, horizon: float) -> Optional[float]:
+        """Return the first time from start with no wet slot in the following horizon, or None if beyond the forecast."""
+        if not self.times:
+            return None
+        clear_at = start
+        while True:
+            lo, hi = bisect_left(self.times, clear_at), bisect_right(self.times, clear_at + horizon)
+            last_wet = self._last_wet[hi]
+            if last_wet < lo:
+                break
+            clear_at = self.times[last_wet] + 1
+        return clear_at if clear_at <= self.times[-1] else None
+
+
+class _NowcastEvaluator:
+    """Nowcast revision and precipitation answers shared by every app instance reading the same sensor.
+
+    All methods are safe to call from any AppDaemon worker thread.
+    """
+
+    def __init__(self, entity_id: str):
+        self.entity_id = entity_id
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._state: Any = None
+        self._forecast: Any = None
+        self._timeline: Optional[_NowcastTimeline] = None
+        # horizon -> (version, expiry, result); a result expires after the TTL or once the forecast makes it stale
+        self._cache: Dict[int, Tuple[int, float, bool]] = {}
+
+    def update(self, state: Any, forecast: Any) -> bool:
+        """Record the sensor's current state and forecast; return True if this is a new revision."""
+        with self._lock:
+            if self.version and state == self._state and forecast == self._forecast:
+                return False
+            self._state, self._forecast = state, forecast
+            self._timeline = _NowcastTimeline(forecast) if isinstance(forecast, list) else None
+            self._cache.clear()
+            self.version += 1
+            return True
+
+    def precipitation_within(self, horizon: int, now: float, ttl: int) -> bool:
+        """Return True if precipitation is detected now or forecast within horizon seconds."""
+        with self._lock:
+            cached = self._cache.get(horizon)
+            if cached is not None and cached[0] == self.version and now < cached[1]:
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+            expiry = now + ttl
+            if self._state in [None, "unavailable", "unknown"]:
+                result = False
+            elif self._raining():
+                # Holds until the sensor reports a new revision
+                result = True
+            elif self._timeline is None:
+                result = False
+            else:
+                result = self._timeline.wet_between(now, now + horizon)
+                # Until the last wet slot in sight has passed, or the next one comes within the horizon
+                changes_at = self._timeline.clear_at(now, horizon) if result else self._timeline.next_wet_after(now + horizon)
+                if changes_at is not None:
+                    expiry = min(expiry, changes_at - horizon if not result else changes_at)
+            self._cache[horizon] = (self.version, expiry, result)
+            return result
+
+    def clear_at(self, now: float, horizon: int) -> Optional[float]:
+        """Return the start of the first rain-free horizon, or None if the forecast cannot tell."""
+        with self._lock:
+            if self._timeline is None:
+                return None
+            # Currently raining: nothing changes before the next forecast slot starts
+            start: Optional[float] = now
+            if self._raining():
+                start = self._timeline.next_slot_after(now)
+            return self._timeline.clear_at(start, horizon) if start is not None else None
+
+    def _raining(self) -> bool:
+        """Return True if the sensor state reports precipitation right now."""
+        try:
+            return float(self._state) > 0
+        except (ValueError, TypeError):
+            return False
+
+
+_nowcast_evaluators: Dict[str, _NowcastEvaluator] = {}
+_nowcast_evaluators_lock = threading.Lock()
+
+
+def _nowcast_evaluator(entity_id: str) -> _NowcastEvaluator:
+    """Return the process-wide evaluator for entity_id, creating it on first use."""
+    with _nowcast_evaluators_lock:
+        evaluator = _nowcast_evaluators.get(entity_id)
+        if evaluator is None:
+            evaluator = _nowcast_evaluators[entity_id] = _NowcastEvaluator(entity_id)
+        return evaluator
+
+
+class _PresenceIndex:
+    """Tracker states shared by all rooms and app instances, kept current by state listeners.
+
+    Works for both device_tracker.* and person.* entities, which report "home" when present.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, Any] = {}
+
+    def update(self, entity_id: str, state: Any):
+        """Record the latest state of a tracker."""
+        with self._lock:
+            self._states[entity_id] = state
+
+    def home(self, entity_ids: Iterable[str]) -> set:
+        """Return the subset of entity_ids that are currently home."""
+        with self._lock:
+            return {entity_id for entity_id in entity_ids if self._states.get(entity_id) == "home"}
+
+
+_presence = _PresenceIndex()
+
+
+class _ActionRouter:
+    """Process-wide dispatcher of notification actions to the app instances that sent them.
+
+    One registered app holds the only mobile_app_notification_action subscription. Each action
+    ("<app>.<type>.<room key>.<notify service>") is parsed once and dispatched through a dict
+    keyed by (app name, action type); actions naming a notify service the app does not use are
+    rejected. When the subscribed app terminates, another registered app takes the subscription over.
+    """
+
+    EVENT = "mobile_app_notification_action"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Any] = {}
+        self._apps: Dict[str, Tuple[Any, frozenset]] = {}
+        self._owner: Optional[str] = None
+
+    def register(self, app: Any, handlers: Dict[str, Any], services: Iterable[str]):
+        """Route app's actions to handlers by action type, subscribing to the event if no app has yet."""
+        with self._lock:
+            self._drop(app.name)
+            self._apps[app.name] = (app, frozenset(services))
+            for action_type, handler in handlers.items():
+                self._routes[(app.name, action_type)] = handler
+            if self._owner is None:
+                self._subscribe(app)
+
+    def unregister(self, app: Any):
+        """Remove app's routes and hand the event subscription over to another app if app held it."""
+        with self._lock:
+            if self._apps.get(app.name, (None,))[0] is not app:
+                return
+            self._drop(app.name)
+            if self._owner == app.name:
+                # AppDaemon cancels the terminating app's listeners itself
+                self._owner = None
+                for successor, _ in self._apps.values():
+                    self._subscribe(successor)
+                    break
+
+    def dispatch(self, event_name: str, data: Dict[str, Any], kwargs):
+        """Parse one notification action and call the handler registered for its app and action type."""
+        parts = (data or {}).get("action", "").split(".")
+        if len(parts) != 4:
+            return
+        app_name, action_type, room_key, notify_service = parts
+        with self._lock:
+            handler = self._routes.get((app_name, action_type))
+            app, services = self._apps.get(app_name, (None, frozenset()))
+        if handler is None:
+            return
+        if notify_service not in services:
+            app.log(f"Ignoring action for unknown notify service: {data['action']}", level="WARNING")
+            return
+        handler(room_key, notify_service, data["action"])
+
+    def _drop(self, app_name: str):
+        self._apps.pop(app_name, None)
+        for route in [route for route in self._routes if route[0] == app_name]:
+            del self._routes[route]
+
+    def _subscribe(self, app: Any):
+        app.listen_event(self.dispatch, self.EVENT)
+        self._owner = app.name
+
+
+_actions = _ActionRouter()
+
 
 class TemperatureWindowNotification(hass.Hass):
     """AppDaemon app that monitors temperature and window/door sensors and sends notifications when conditions are met."""
@@ -45,31 +861,34 @@ class TemperatureWindowNotification(hass.Hass):
         self.log("Loading TemperatureWindowNotification")
         try:
             # Load and validate configuration
-            self.temperature_config = self.args.get("temperature", {})
-            self.window_config = self.args.get("window", {})
-            self.messages_config = self.args.get("messages", {})
             self.time_config = self.args.get("when", {})
             self.persons = self.args.get("persons", [])
             self.nowcast_sensor = self.args.get("nowcast_sensor")
+            self.nowcast_cache_ttl = self.args.get("nowcast_cache_ttl", 300)
+            self.notify_group = self.args.get("notify_group")
+            self.digest_window = self.args.get("digest_window", 0)
+            self.actions = self.args.get("actions", ["ignore"])
+            self.snooze_minutes = self.args.get("snooze_minutes", 30)
+            self.notify_workers = self.args.get("notify_workers", 4)
+            self.notify_timeout = self.args.get("notify_timeout", 10)
+            self.retry_config = self.args.get("retry", {})
+            self.breaker_config = self.args.get("circuit_breaker", {})
+            self.store_config = self.args.get("store", {})
+            self.mode = self.args.get("mode", "poll")
+            self.safety_interval = self.args.get("safety_interval", 900)
+            self.interval_config = self.args.get("check_interval", {"min": 60, "max": 600})
 
-            # Validate required sections and keys
-            if not self.temperature_config:
-                raise ValueError("Missing required configuration: temperature")
-            for key in ["sensor", "below", "above"]:
-                if key not in self.temperature_config:
-                    raise ValueError(f"Missing required key '{key}' in temperature configuration")
-
-            if not self.window_config:
-                raise ValueError("Missing required configuration: window")
-            for key in ["sensor", "below", "above"]:
-                if key not in self.window_config:
-                    raise ValueError(f"Missing required key '{key}' in window configuration")
-
-            if not self.messages_config:
-                raise ValueError("Missing required configuration: messages")
-            for key in ["below", "above", "title", "cooldown"]:
-                if key not in self.messages_config:
-                    raise ValueError(f"Missing required key '{key}' in messages configuration")
+            # Rooms come from the rooms list, or from the top-level sections for a single-room app
+            rooms_config = self.args.get("rooms")
+            if rooms_config is None:
+                self.rooms = [self._parse_room({"name": self.name}, "")]
+            else:
+                if not isinstance(rooms_config, list) or not rooms_config:
+                    raise ValueError("rooms must be a non-empty list")
+                self.rooms = [self._parse_room(room_config, f"rooms[{i}].") for i, room_config in enumerate(rooms_config)]
+                keys = [room.key for room in self.rooms]
+                if len(set(keys)) != len(keys):
+                    raise ValueError("room names must be unique")
 
             if not self.time_config:
                 raise ValueError("Missing required configuration: when")
@@ -80,29 +899,6 @@ class TemperatureWindowNotification(hass.Hass):
             # Validate types and values
             if self.nowcast_sensor is not None and not isinstance(self.nowcast_sensor, str):
                 raise ValueError("nowcast_sensor must be a string if provided")
-            if not isinstance(self.temperature_config["sensor"], str):
-                raise ValueError("temperature.sensor must be a string")
-            try:
-                below, above = float(self.temperature_config["below"]), float(self.temperature_config["above"])
-                if below >= above:
-                    raise ValueError("temperature.below must be less than temperature.above")
-                self.temperature_config["below"], self.temperature_config["above"] = below, above
-            except (ValueError, TypeError):
-                raise ValueError("temperature.below and temperature.above must be numbers")
-            if not isinstance(self.window_config["sensor"], str):
-                raise ValueError("window.sensor must be a string")
-            if self.window_config["below"] not in ["on", "off"] or self.window_config["above"] not in ["on", "off"]:
-                raise ValueError("window.below and window.above must be 'on' or 'off'")
-            for field in ["below", "above", "title"]:
-                if not isinstance(self.messages_config[field], str) or not self.messages_config[field].strip():
-                    raise ValueError(f"messages.{field} must be a non-empty string")
-            try:
-                cooldown = int(self.messages_config["cooldown"])
-                if cooldown <= 0:
-                    raise ValueError("messages.cooldown must be a positive integer")
-                self.messages_config["cooldown"] = cooldown
-            except (ValueError, TypeError):
-                raise ValueError("messages.cooldown must be a positive integer")
             try:
                 after, before = int(self.time_config["after"]), int(self.time_config["before"])
                 if not (0 <= after <= 23) or not (0 <= before <= 23):
@@ -112,6 +908,86 @@ class TemperatureWindowNotification(hass.Hass):
                 self.time_config["after"], self.time_config["before"] = after, before
             except (ValueError, TypeError):
                 raise ValueError("when.after and when.before must be integers")
+            try:
+                nowcast_cache_ttl = int(self.nowcast_cache_ttl)
+                if nowcast_cache_ttl <= 0:
+                    raise ValueError("nowcast_cache_ttl must be a positive integer")
+                self.nowcast_cache_ttl = nowcast_cache_ttl
+            except (ValueError, TypeError):
+                raise ValueError("nowcast_cache_ttl must be a positive integer")
+            if self.notify_group is not None and (not isinstance(self.notify_group, str) or not self.notify_group.strip()):
+                raise ValueError("notify_group must be a non-empty string if provided")
+            try:
+                digest_window = int(self.digest_window)
+                if digest_window < 0:
+                    raise ValueError("digest_window must be a non-negative integer")
+                self.digest_window = digest_window
+            except (ValueError, TypeError):
+                raise ValueError("digest_window must be a non-negative integer")
+            if not isinstance(self.actions, list) or not self.actions or not set(self.actions) <= set(ACTIONS) \
+                    or len(set(self.actions)) != len(self.actions):
+                raise ValueError(f"actions must be a non-empty list of distinct values from: {', '.join(ACTIONS)}")
+            for field in ["snooze_minutes", "notify_workers", "notify_timeout"]:
+                try:
+                    value = int(getattr(self, field))
+                    if value <= 0:
+                        raise ValueError(f"{field} must be a positive integer")
+                    setattr(self, field, value)
+                except (ValueError, TypeError):
+                    raise ValueError(f"{field} must be a positive integer")
+            if not isinstance(self.retry_config, dict):
+                raise ValueError("retry must be a dictionary")
+            retry_defaults = {"max_attempts": 4, "base_delay": 30, "max_delay": 900, "queue_size": 50}
+            for field, default in retry_defaults.items():
+                try:
+                    value = int(self.retry_config.get(field, default))
+                    if value <= 0:
+                        raise ValueError(f"retry.{field} must be a positive integer")
+                    self.retry_config[field] = value
+                except (ValueError, TypeError):
+                    raise ValueError(f"retry.{field} must be a positive integer")
+            if not isinstance(self.breaker_config, dict):
+                raise ValueError("circuit_breaker must be a dictionary")
+            for field, default in {"failure_threshold": 3, "reset_timeout": 300}.items():
+                try:
+                    value = int(self.breaker_config.get(field, default))
+                    if value <= 0:
+                        raise ValueError(f"circuit_breaker.{field} must be a positive integer")
+                    self.breaker_config[field] = value
+                except (ValueError, TypeError):
+                    raise ValueError(f"circuit_breaker.{field} must be a positive integer")
+            if self.store_config is not False:
+                if not isinstance(self.store_config, dict):
+                    raise ValueError("store must be a dictionary or false")
+                path = self.store_config.get("path", os.path.join(os.path.dirname(os.path.abspath(__file__)), "i1_open_window.sqlite"))
+                if not isinstance(path, str) or not path.strip():
+                    raise ValueError("store.path must be a non-empty string")
+                try:
+                    flush_interval = int(self.store_config.get("flush_interval", 60))
+                    if flush_interval <= 0:
+                        raise ValueError("store.flush_interval must be a positive integer")
+                except (ValueError, TypeError):
+                    raise ValueError("store.flush_interval must be a positive integer")
+                self.store_config = {"path": path, "flush_interval": flush_interval}
+            if self.mode not in ["poll", "event"]:
+                raise ValueError("mode must be 'poll' or 'event'")
+            try:
+                safety_interval = int(self.safety_interval)
+                if safety_interval <= 0:
+                    raise ValueError("safety_interval must be a positive integer")
+                self.safety_interval = safety_interval
+            except (ValueError, TypeError):
+                raise ValueError("safety_interval must be a positive integer")
+            if not isinstance(self.interval_config, dict):
+                raise ValueError("check_interval must be a dictionary with 'min' and 'max'")
+            try:
+                min_interval = int(self.interval_config.get("min", 60))
+                max_interval = int(self.interval_config.get("max", 600))
+                if min_interval <= 0 or min_interval > max_interval:
+                    raise ValueError("check_interval.min must be positive and not greater than check_interval.max")
+                self.interval_config = {"min": min_interval, "max": max_interval}
+            except (ValueError, TypeError):
+                raise ValueError("check_interval.min and check_interval.max must be positive integers with min <= max")
             if not isinstance(self.persons, list) or not self.persons:
                 raise ValueError("persons must be a non-empty list")
             for i, person in enumerate(self.persons):
@@ -124,172 +1000,897 @@ class TemperatureWindowNotification(hass.Hass):
                 if "tracker" in person and not isinstance(person["tracker"], str):
                     raise ValueError(f"person {i}.tracker must be a string")
 
-            # Initialize state
-            self._message_cooldowns: Dict[str, float] = {}
-            self._precipitation_cache = {"result": False, "timestamp": 0}
+            # Initialize state; cooldowns map (room key, notify service, condition) to the time that person may
+            # be notified again about that condition in that room, and only configured combinations are accepted
+            # Everything more than one callback touches lives behind the lock of one state object
+            self._state = _AppState(_ExpiryHeap(
+                (room.key, person["notify"], condition)
+                for room in self.rooms for person in self.persons for condition in CONDITIONS
+            ))
+            self._store = _ExpiryStore(self.store_config["path"], self.name) if self.store_config else None
+            if self._store:
+                try:
+                    for key, expiry in self._store.load(time.time()).items():
+                        self._state.set_expiry(key, expiry)
+                    self.log(f"Loaded {self._state.cooldown_count()} cooldowns from {self._store.path}")
+                except sqlite3.Error as e:
+                    self.log(f"Failed to load cooldowns from {self._store.path}: {e}", level="WARNING")
+            # Instances reading the same nowcast sensor share one evaluator and its cache
+            self._nowcast = _nowcast_evaluator(self.nowcast_sensor) if self.nowcast_sensor else None
+            # Evaluator revision this instance last re-checked its rooms for
+            self._nowcast_version = 0
+            self._notify_pool = ThreadPoolExecutor(max_workers=self.notify_workers, thread_name_prefix=f"{self.name}_notify")
+            self.delivery_latency: Dict[str, float] = {}
+            # Failed deliveries waiting for their next attempt, as a heap of (due, sequence, delivery)
+            self._retry_queue: List[Tuple[float, int, _Delivery]] = []
+            self._retry_sequence = itertools.count()
+            self._retry_lock = threading.Lock()
+            self._breakers = {
+                service: _CircuitBreaker(self.breaker_config["failure_threshold"], self.breaker_config["reset_timeout"])
+                for service in [person["notify"] for person in self.persons] + ([self.notify_group] if self.notify_group else [])
+            }
+            self.current_interval = self.interval_config["min"]
+            self._dependents = self._build_dependents()
+            self._trackers = frozenset(person["tracker"] for person in self.persons if person.get("tracker"))
+            self._watched_entities = frozenset(self._dependents) - self._trackers
 
             # Set up event listeners and scheduling
-            self.listen_event(self._handle_notification_action, "mobile_app_notification_action")
-
-            # Schedule checks
-            current_hour = datetime.now().hour
-            after_hour, before_hour = self.time_config["after"], self.time_config["before"]
-            if after_hour <= current_hour < before_hour:
-                self.run_every(self._check_conditions, "now", 60)
-                self.log("Started periodic checks (within active time window)")
-            else:
-                now = datetime.now()
-                after_hour = self.time_config["after"]
-                if now.hour < after_hour:
-                    next_check = now.replace(hour=after_hour, minute=0, second=0, microsecond=0)
-                else:
-                    next_check = (now + timedelta(days=1)).replace(hour=after_hour, minute=0, second=0, microsecond=0)
-                self.run_at(self._start_checks, next_check)
+            # Actions reach this app through the shared router, which holds a single event subscription
+            handlers = {
+                "ignore": self._handle_ignore_action, "snooze": self._handle_snooze_action,
+                "mute": self._handle_mute_action, "acknowledge": self._handle_acknowledge_action,
+            }
+            _actions.register(self, {action: handlers[action] for action in self.actions}, self._breakers.keys())
+            if self.nowcast_sensor:
+                self.listen_state(self._handle_nowcast_change, self.nowcast_sensor, attribute="all")
+            for tracker in sorted(self._trackers):
+                self.listen_state(self._handle_presence_change, tracker)
+            if self.mode == "event":
+                for entity in sorted(self._watched_entities - {self.nowcast_sensor}):
+                    self.listen_state(self._handle_state_change, entity)
+
+            # Fill the presence index once; the tracker listeners keep it current from here on
+            if self._trackers:
+                states = self.get_state()
+                for tracker in self._trackers:
+                    _presence.update(tracker, ((states or {}).get(tracker) or {}).get("state"))
+
+            # Schedule checks; every timer handle is kept in the registry
+            if self._in_time_window():
+                self._begin_checks()
+                self.log(f"Started {self.mode} checks (within active time window)")
+
+            if self._store:
+                flush_interval = self.store_config["flush_interval"]
+                self._schedule("flush", self.run_every(
+                    self._flush_store, datetime.now() + timedelta(seconds=flush_interval), flush_interval))
 
             after_hour = self.time_config["after"]
-            self.run_daily(self._start_checks, datetime.now().replace(hour=after_hour, minute=0, second=0, microsecond=0))
+            self._schedule("daily", self.run_daily(
+                self._start_checks, datetime.now().replace(hour=after_hour, minute=0, second=0, microsecond=0)))
 
-            self.log("TemperatureWindowNotification initialized successfully")
+            self.log(f"TemperatureWindowNotification initialized successfully ({len(self.rooms)} rooms)")
         except ValueError as e:
             self.log(f"Configuration error: {e}", level="ERROR")
             raise
 
+    def terminate(self):
+        """Flush buffered cooldowns and release the notification worker pool when the app is stopped or reloaded."""
+        _actions.unregister(self)
+        if getattr(self, "_store", None):
+            self._flush_store({})
+        pool = getattr(self, "_notify_pool", None)
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _flush_store(self, kwargs):
+        """Write buffered cooldown and ignore expiries to the store."""
+        try:
+            written = self._store.flush()
+            if written:
+                self.log(f"Flushed {written} cooldowns to {self._store.path}", level="DEBUG")
+        except sqlite3.Error as e:
+            self.log(f"Failed to flush cooldowns to {self._store.path}: {e}", level="WARNING")
+
+    def _set_cooldown(self, key: Tuple[str, str, str], expiry: float) -> bool:
+        """Block key until expiry and buffer the change for the store; return False for unknown keys."""
+        if not self._state.set_expiry(key, expiry):
+            return False
+        if self._store:
+            self._store.put(key, expiry)
+        return True
+
+    def _parse_room(self, room_config: Dict[str, Any], prefix: str) -> _Room:
+        """Validate one room configuration and return it as a room object.
+
+        Room sections override the top-level temperature, window and messages sections, so
+        settings shared by every room (such as messages.cooldown) only need to be given once.
+        messages.cooldown is either one number of seconds or a mapping with a value per condition.
+        """
+        if not isinstance(room_config, dict):
+            raise ValueError(f"{prefix.rstrip('.')} must be a dictionary")
+        name = room_config.get("name")
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError(f"{prefix}name must be a non-empty string")
+
+        sections = {}
+        for section, keys in [("temperature", ["sensor", "below", "above"]),
+                              ("window", ["sensor", "below", "above"]),
+                              ("messages", ["below", "above", "title", "cooldown"])]:
+            merged = dict(self.args.get(section) or {}, **(room_config.get(section) or {}))
+            if not merged:
+                raise ValueError(f"Missing required configuration: {prefix}{section}")
+            for key in keys:
+                if key not in merged:
+                    raise ValueError(f"Missing required key '{key}' in {prefix}{section} configuration")
+            sections[section] = merged
+        temperature_config, window_config, messages_config = sections["temperature"], sections["window"], sections["messages"]
+
+        if not isinstance(temperature_config["sensor"], str):
+            raise ValueError(f"{prefix}temperature.sensor must be a string")
+        try:
+            below, above = float(temperature_config["below"]), float(temperature_config["above"])
+            if below >= above:
+                raise ValueError(f"{prefix}temperature.below must be less than temperature.above")
+            temperature_config["below"], temperature_config["above"] = below, above
+        except (ValueError, TypeError):
+            raise ValueError(f"{prefix}temperature.below and temperature.above must be numbers")
+        if not isinstance(window_config["sensor"], str):
+            raise ValueError(f"{prefix}window.sensor must be a string")
+        if window_config["below"] not in ["on", "off"] or window_config["above"] not in ["on", "off"]:
+            raise ValueError(f"{prefix}window.below and window.above must be 'on' or 'off'")
+        for field in ["below", "above", "title"]:
+            if not isinstance(messages_config[field], str) or not messages_config[field].strip():
+                raise ValueError(f"{prefix}messages.{field} must be a non-empty string")
+        cooldown = messages_config["cooldown"]
+        if not isinstance(cooldown, dict):
+            cooldown = {condition: cooldown for condition in CONDITIONS}
+        try:
+            cooldown = {condition: int(cooldown[condition]) for condition in CONDITIONS}
+            if min(cooldown.values()) <= 0:
+                raise ValueError(f"{prefix}messages.cooldown must be a positive integer")
+            messages_config["cooldown"] = cooldown
+        except (KeyError, ValueError, TypeError):
+            raise ValueError(f"{prefix}messages.cooldown must be a positive integer or have positive integers for below and above")
+
+        return _Room(name, temperature_config, window_config, messages_config)
+
+    def _build_dependents(self) -> Dict[str, Tuple[Tuple[_Room, ...], Tuple[Dict[str, Any], ...]]]:
+        """Build the inverted index from each watched entity to the rooms and persons that depend on it.
+
+        Room sensors map to the rooms that read them. Trackers map to their persons and to every
+        room (any room may have an alert waiting for that person), and the nowcast sensor maps to
+        the rooms whose open-window alerts it can suppress.
+        """
+        rooms: Dict[str, List[_Room]] = {}
+        persons: Dict[str, List[Dict[str, Any]]] = {}
+        for room in self.rooms:
+            for sensor in (room.temperature_sensor, room.window_sensor):
+                if room not in rooms.setdefault(sensor, []):
+                    rooms[sensor].append(room)
+        for person in self.persons:
+            tracker = person.get("tracker")
+            if tracker:
+                persons.setdefault(tracker, []).append(person)
+                rooms.setdefault(tracker, list(self.rooms))
+        if self.nowcast_sensor:
+            rooms.setdefault(self.nowcast_sensor, []).extend(room for room in self.rooms if room.window_above)
+        return {entity: (tuple(rooms.get(entity, ())), tuple(persons.get(entity, ()))) for entity in rooms}
+
+    def _in_time_window(self) -> bool:
+        """Return True if the current hour is inside the configured when window."""
+        current_hour = datetime.now().hour
+        after_hour, before_hour = self.time_config["after"], self.time_config["before"]
+        if after_hour < before_hour:
+            return after_hour <= current_hour < before_hour
+        return current_hour >= after_hour or current_hour < before_hour
+
+    def _window_end(self) -> datetime:
+        """Return the next time the when window closes."""
+        now = datetime.now()
+        end = now.replace(hour=self.time_config["before"], minute=0, second=0, microsecond=0)
+        return end if end > now else end + timedelta(days=1)
+
+    @property
+    def timer_count(self) -> int:
+        """Number of scheduler handles currently held by this instance."""
+        return self._state.timer_count()
+
+    def _schedule(self, name: str, handle: Any) -> Any:
+        """Record a timer handle under name, cancelling any timer already held under that name."""
+        previous = self._state.put_timer(name, handle)
+        if previous is not None:
+            self._cancel_handle(name, previous)
+        return handle
+
+    def _cancel(self, name: str):
+        """Cancel and forget the timer held under name, if any."""
+        handle = self._state.pop_timer(name)
+        if handle is not None:
+            self._cancel_handle(name, handle)
+
+    def _cancel_handle(self, name: str, handle: Any):
+        """Cancel one scheduler handle, logging failures."""
+        try:
+            self.cancel_timer(handle)
+        except Exception as e:
+            self.log(f"Failed to cancel timer {name}: {e}", level="WARNING")
+
     def _start_checks(self, kwargs):
-        """Start periodic condition checking."""
-        self.run_every(self._check_conditions, "now", 60)
+        """Start the check loop at the beginning of the when window."""
+        self._begin_checks()
+
+    def _begin_checks(self):
+        """Start the check loop (a safety-net timer in event mode), replacing any loop already running."""
+        self._schedule("checks", self.run_in(self._tick, 0))
+        self._schedule("stop", self.run_at(self._stop_checks, self._window_end()))
+        self.log(f"Check loop started ({self.timer_count} timers held)", level="DEBUG")
+
+    def _stop_checks(self, kwargs):
+        """Stop the check loop at the end of the when window."""
+        self._state.pop_timer("stop")
+        self._cancel("checks")
+        self.log(f"Check loop stopped ({self.timer_count} timers held)", level="DEBUG")
+
+    def _tick(self, kwargs):
+        """Run one scheduled check and schedule the next one."""
+        self._state.pop_timer("checks")
+        self._reschedule(self._check_conditions(kwargs))
+
+    def _reschedule(self, snapshot: _StateSnapshot):
+        """Schedule a single run_at for the earlier of the cadence interval and the planned wake time."""
+        if not self._in_time_window():
+            self._cancel("checks")
+            return
+        now = time.time()
+        self.current_interval = self._next_interval()
+        wake = max(now + 1, min(now + self.current_interval, self._plan_next_wake(now, snapshot)))
+        self._schedule("checks", self.run_at(self._tick, datetime.fromtimestamp(wake)))
+
+    def _plan_next_wake(self, now: float, snapshot: _StateSnapshot) -> float:
+        """Return the earliest time at which the outcome of a check can change without a state change."""
+        candidates = [self._window_end().timestamp()]
+        active = [result for result in (room.result for room in self.rooms) if result.active_condition]
+        if any(not result.rain_suppressed for result in active):
+            # Covers both message cooldowns and "Ignore today", which are stored as expiry times
+            next_expiry = self._state.next_expiry(now)
+            if next_expiry is not None:
+                candidates.append(next_expiry)
+        if any(result.rain_suppressed for result in active):
+            clear_at = self._precipitation_clear_at(now, snapshot)
+            if clear_at is not None:
+                candidates.append(clear_at)
+        return min(candidates)
+
+    def _next_interval(self) -> int:
+        """Return seconds until the next check based on each room's distance to its thresholds and slope."""
+        if self.mode == "event":
+            return self.safety_interval
+        return min(self._room_interval(room) for room in self.rooms)
+
+    def _room_interval(self, room: _Room) -> int:
+        """Return seconds until the room needs checking again based on threshold distance and slope."""
+        min_interval, max_interval = self.interval_config["min"], self.interval_config["max"]
+        result = room.result
+        if result.temperature is None:
+            return min_interval
+        to_below = result.temperature - room.below
+        to_above = room.above - result.temperature
+        if to_below < 0 or to_above <= 0:
+            if not result.active_condition:
+                # Past a threshold with the window already as wanted: a steady state that only the window
+                # sensor can end, so there is nothing to gain from checking at the minimum interval
+                return max_interval
+            if not result.rain_suppressed and self._alert_blocked(room, result.active_condition):
+                # Nothing can be sent before a cooldown or ignore expires, which the planned wake time covers
+                return max_interval
+            return min_interval
+        eta_below = to_below / max(-result.slope, ASSUMED_DRIFT)
+        eta_above = to_above / max(result.slope, ASSUMED_DRIFT)
+        interval = int(min(eta_below, eta_above) * CADENCE_SAFETY_FACTOR)
+        return max(min_interval, min(max_interval, interval))
+
+    def _alert_blocked(self, room: _Room, condition: str) -> bool:
+        """Return True if no person can be alerted about the room's condition before a cooldown or ignore expires."""
+        keys = [(room.key, person["notify"], condition) for person in self.persons if person.get("notify")]
+        return self._state.blocked(keys, time.time())
+
+    def _handle_state_change(self, entity: str, attribute: str, old: Any, new: Any, kwargs):
+        """Re-evaluate only the rooms that depend on the entity that actually changed state."""
+        rooms = self._affected_rooms(entity, old, new)
+        if rooms:
+            self._reschedule(self._check_conditions({}, rooms))
+
+    def _affected_rooms(self, entity: str, old: Any, new: Any) -> Tuple[_Room, ...]:
+        """Return the rooms whose outcome a state change of entity can alter."""
+        if old == new or not self._in_time_window():
+            return ()
+        rooms, persons = self._dependents.get(entity, ((), ()))
+        if persons or entity == self.nowcast_sensor:
+            # Presence and rain only matter to rooms that already have an alert condition
+            rooms = tuple(room for room in rooms if room.active_condition)
+        return rooms
+
+    def _handle_nowcast_change(self, entity: str, attribute: str, old: Any, new: Any, kwargs):
+        """Invalidate the shared precipitation cache when the nowcast state or forecast changes."""
+        if self._nowcast_revised(new) and self.mode == "event":
+            self._handle_state_change(entity, attribute, old, new, kwargs)
+
+    def _nowcast_revised(self, new: Any) -> bool:
+        """Feed a nowcast state change to the shared evaluator; return True if this instance has not seen its revision.
+
+        The first instance to see a change creates the revision, so the outcome of update() cannot
+        tell the other instances sharing the evaluator that their rooms need checking.
+        """
+        new_state = new or {}
+        self._nowcast.update(new_state.get("state"), (new_state.get("attributes") or {}).get("forecast"))
+        version = self._nowcast.version
+        if version == self._nowcast_version:
+            return False
+        self._nowcast_version = version
+        return True
+
+    def _handle_presence_change(self, entity: str, attribute: str, old: Any, new: Any, kwargs):
+        """Keep the shared presence index current and, in event mode, re-evaluate rooms with pending alerts."""
+        _presence.update(entity, new)
+        if self.mode == "event":
+            self._handle_state_change(entity, attribute, old, new, kwargs)
 
-    def _check_conditions(self, kwargs):
-        """Check temperature and window conditions and send notifications if needed."""
+    def _take_snapshot(self) -> _StateSnapshot:
+        """Read the entities this app watches, one by one or, for many of them, in one read of the namespace."""
+        # The snapshot is read-only, so AppDaemon need not deep-copy what it returns
+        if len(self._watched_entities) > SNAPSHOT_ENTITY_READS:
+            states = self.get_state(copy=False)
+        else:
+            states = {entity: self.get_state(entity, attribute="all", copy=False) for entity in self._watched_entities}
+        return _StateSnapshot(states, self._watched_entities)
+
+    def _check_conditions(self, kwargs, rooms: Optional[Iterable[_Room]] = None) -> _StateSnapshot:
+        """Evaluate the given rooms (all rooms by default) against one state snapshot and return the snapshot."""
+        snapshot = self._take_snapshot()
+        self._evaluate_rooms(snapshot, rooms)
+        return snapshot
+
+    def _evaluate_rooms(self, snapshot: _StateSnapshot, rooms: Optional[Iterable[_Room]]):
+        """Evaluate rooms against snapshot, publish the results and act on them."""
+        for room in self.rooms if rooms is None else rooms:
+            temperature, condition, rain_suppressed = self._evaluate_room(room, snapshot)
+            previous = self._state.publish(room, time.time(), temperature, condition, rain_suppressed).active_condition
+            # A missing reading says nothing about the condition, so only a real reading clears it
+            if previous and temperature is not None and condition != previous:
+                # Alerts still waiting for the digest window are stale now; drop them before they are sent
+                self._state.withdraw(room.key, previous)
+                self._clear_notifications(self._tag(room, previous))
+                self._update_digests(room, previous)
+                self._release_acknowledged(room, previous)
+            if condition and not rain_suppressed:
+                message = room.message_above if condition == "above" else room.message_below
+                self.log(f"ALERT: {message}")
+                self._send_notification(room, condition, temperature)
+
+    def _evaluate_room(self, room: _Room, snapshot: _StateSnapshot) -> Tuple[Optional[float], Optional[str], bool]:
+        """Check one room's temperature and window conditions without changing any state.
+
+        Returns the temperature (None if unreadable), the alert condition found (None if none)
+        and whether an open window alert is held back by a precipitation forecast.
+        """
         # Get temperature
-        temp_state = self.get_state(self.temperature_config["sensor"])
+        temp_state = snapshot.state(room.temperature_sensor)
         if temp_state in ["unavailable", "unknown", None]:
-            return
+            return None, None, False
         try:
             temperature = float(temp_state)
         except (ValueError, TypeError):
-            return
+            return None, None, False
 
         # Get window state
-        window_state = self.get_state(self.window_config["sensor"])
-        window_open = window_state == "on"
-
-        # Evaluate conditions and send notifications
-        temp_above, temp_below = self.temperature_config["above"], self.temperature_config["below"]
-        window_above, window_below = self.window_config["above"] == "on", self.window_config["below"] == "on"
+        window_open = snapshot.state(room.window_sensor) == "on"
 
         # Check if temperature is too high and window should be open but isn't
-        if temperature >= temp_above and window_open != window_above:
-            if window_above and self._precipitation_expected():
-                self.log("Skipping open window notification due to precipitation forecast")
-                return
-            message = self.messages_config["above"]
-            self.log(f"ALERT: {message}")
-            self._send_notification(message, temperature)
-            return
+        if temperature >= room.above and window_open != room.window_above:
+            if room.window_above:
+                if snapshot.precipitation is None:
+                    snapshot.precipitation = self._precipitation_expected(snapshot)
+                if snapshot.precipitation:
+                    self.log(f"Skipping open window notification for {room.name} due to precipitation forecast")
+                    return temperature, "above", True
+            return temperature, "above", False
 
         # Check if temperature is too low and window should be closed but isn't
-        if temperature < temp_below and window_open != window_below:
-            message = self.messages_config["below"]
-            self.log(f"ALERT: {message}")
-            self._send_notification(message, temperature)
-            return
+        if temperature < room.below and window_open != room.window_below:
+            return temperature, "below", False
+        return temperature, None, False
 
-
-
-    def _precipitation_expected(self) -> bool:
+    def _precipitation_expected(self, snapshot: _StateSnapshot) -> bool:
         """Return True if precipitation is detected or forecasted within 30 minutes, else False."""
         if not self.nowcast_sensor:
             return False
 
-        # Cache result for 5 minutes to avoid repeated API calls
-        now = time.time()
-        if now - self._precipitation_cache["timestamp"] < 300:
-            return self._precipitation_cache["result"]
+        # Seed the shared evaluator once; afterwards the nowcast listener keeps it current
+        if not self._nowcast.version:
+            self._nowcast.update(snapshot.state(self.nowcast_sensor), snapshot.attribute(self.nowcast_sensor, "forecast"))
+        return self._nowcast.precipitation_within(PRECIPITATION_HORIZON, time.time(), self.nowcast_cache_ttl)
 
-        state = self.get_state(self.nowcast_sensor, attribute=None)
-        if state in [None, "unavailable", "unknown"]:
-            self._precipitation_cache = {"result": False, "timestamp": now}
-            return False
+    @property
+    def nowcast_cache_hits(self) -> int:
+        """Precipitation cache hits of the shared nowcast evaluator."""
+        return self._nowcast.hits if self._nowcast else 0
 
-        try:
-            if float(state) > 0:
-                self._precipitation_cache = {"result": True, "timestamp": now}
-                return True
-        except Exception:
-            pass
+    @property
+    def nowcast_cache_misses(self) -> int:
+        """Precipitation cache misses of the shared nowcast evaluator."""
+        return self._nowcast.misses if self._nowcast else 0
 
-        forecast = self.get_state(self.nowcast_sensor, attribute="forecast")
-        if not isinstance(forecast, list):
-            self._precipitation_cache = {"result": False, "timestamp": now}
-            return False
+    def _precipitation_clear_at(self, now: float, snapshot: _StateSnapshot) -> Optional[float]:
+        """Return the start of the first rain-free horizon in the nowcast, or None if the forecast cannot tell."""
+        if not self._nowcast:
+            return None
+        if not self._nowcast.version:
+            self._nowcast.update(snapshot.state(self.nowcast_sensor), snapshot.attribute(self.nowcast_sensor, "forecast"))
+        return self._nowcast.clear_at(now, PRECIPITATION_HORIZON)
 
-        current_time = datetime.now()
-        for entry in forecast:
-            dt_str = entry.get("datetime")
-            precip = entry.get("precipitation")
-            if dt_str is None or precip is None:
-                continue
-            try:
-                dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-                if 0 <= (dt - current_time).total_seconds() <= 1800 and float(precip) > 0:
-                    self._precipitation_cache = {"result": True, "timestamp": now}
-                    return True
-            except Exception:
-                continue
-
-        self._precipitation_cache = {"result": False, "timestamp": now}
-        return False
-
-    def _send_notification(self, message: str, temperature: float):
-        """Send notification to all persons at home."""
-        title = self.messages_config["title"]
+    def _send_notification(self, room: _Room, condition: str, temperature: float):
+        """Send the room's notification for condition to all persons at home according to the presence index."""
+        message, cooldown = (room.message_above, room.cooldown_above) if condition == "above" else \
+            (room.message_below, room.cooldown_below)
         full_message = f"{message} ({temperature}°C)"
-        cooldown_seconds = self.messages_config["cooldown"]
+        home = _presence.home(self._trackers)
+        now = time.time()
 
+        alerts: Dict[str, List[_Alert]] = {}
         for person in self.persons:
             notify_service = person.get("notify")
             if not notify_service:
                 continue
 
-            last_notification = self._message_cooldowns.get(notify_service, 0)
-            if time.time() - last_notification < cooldown_seconds:
+            key = (room.key, notify_service, condition)
+            if self._breakers[notify_service].rejects(now):
                 continue
 
             tracker = person.get("tracker")
-            if tracker and self.get_state(tracker) != "home":
+            if tracker and tracker not in home:
                 continue
 
-            try:
-                action_data = {
-                    "actions": [{
-                        "action": f"{self.name}.ignore.{notify_service}",
-                        "title": "Ignore today"
-                    }]
-                }
-                self.call_service(f"notify/{notify_service}", message=full_message, data=action_data)
-                self._message_cooldowns[notify_service] = time.time()
-                self.log(f"Notification sent to {notify_service}")
-            except Exception as e:
-                line_num = traceback.extract_tb(e.__traceback__)[-1].lineno
-                self.log(f"Failed to send notification to {notify_service}: {e} (line {line_num})", level="ERROR")
-
-    def _handle_notification_action(self, event_name: str, data: Dict[str, Any], kwargs):
-        """Handle notification action responses from mobile app."""
-        action = data.get("action", "")
-        if not action or "." not in action:
+            # Checking the cooldown and marking the key in flight is one step, so concurrent passes cannot both send
+            if not self._state.claim(key, now):
+                continue
+
+            alerts[notify_service] = [_Alert(room, full_message, key, cooldown)]
+
+        if not self.digest_window:
+            self._deliver(self._build_deliveries(alerts))
             return
 
-        action_parts = action.split(".")
-        if len(action_parts) != 3 or action_parts[0] != self.name:
+        # Hold the alerts until the digest window closes; their claimed keys keep later passes from adding them again
+        first = False
+        for notify_service, service_alerts in alerts.items():
+            first = self._state.collect(notify_service, service_alerts) or first
+        if first:
+            self._schedule("digest", self.run_in(self._flush_digest, self.digest_window))
+
+    def _tag(self, room: Optional[_Room] = None, condition: Optional[str] = None) -> str:
+        """Return the notification tag of a room and condition, or of the digest without arguments."""
+        return f"{self.name}.{room.key}.{condition}" if room else f"{self.name}.digest"
+
+    def _clear_notifications(self, tag: str):
+        """Remove the notification carrying tag from every notify service it was delivered to."""
+        services = self._state.pop_posted(tag)
+        if services:
+            self.log(f"Clearing notification {tag}")
+            self._deliver([_Delivery(service, CLEAR_NOTIFICATION, {"tag": tag}, {}) for service in sorted(services)])
+
+    def _update_digests(self, room: _Room, condition: str):
+        """Rewrite every shown digest listing a resolved room condition without it, or clear it if nothing is left."""
+        deliveries = []
+        for service, remaining in sorted(self._state.resolve_in_digests(room.key, condition).items()):
+            if remaining:
+                deliveries.append(self._make_delivery(service, remaining, {}))
+            elif self._state.discard_posted(self._tag(), service):
+                deliveries.append(_Delivery(service, CLEAR_NOTIFICATION, {"tag": self._tag()}, {}))
+        if deliveries:
+            self.log(f"Updating digest after {room.name} resolved")
+            self._deliver(deliveries)
+
+    def _flush_digest(self, kwargs):
+        """Send one combined notification per person for every alert collected in the digest window."""
+        self._state.pop_timer("digest")
+        self._deliver(self._build_deliveries(self._state.take_digest()))
+
+    def _build_deliveries(self, alerts: Dict[str, List[_Alert]]) -> List[_Delivery]:
+        """Turn alerts per notify service into deliveries, collapsing them into one group call where possible."""
+        if self.notify_group and len(alerts) > 1 and len(alerts) == len(self.persons) \
+                and not self._breakers[self.notify_group].rejects(time.time()):
+            contents = {tuple((alert.room.key, alert.line) for alert in service_alerts) for service_alerts in alerts.values()}
+            if len(contents) == 1:
+                # Everyone is eligible for the same alerts, so one call to the group reaches exactly the same people
+                first = next(iter(alerts.values()))
+                cooldowns = {alert.key: alert.cooldown for service_alerts in alerts.values() for alert in service_alerts}
+                return [self._make_delivery(self.notify_group, first, cooldowns)]
+        return [
+            self._make_delivery(service, service_alerts, {alert.key: alert.cooldown for alert in service_alerts})
+            for service, service_alerts in alerts.items()
+        ]
+
+    def _make_delivery(self, service: str, alerts: List[_Alert], cooldowns: Dict[Tuple[str, str, str], int]) -> _Delivery:
+        """Build the message and per-room action buttons for alerts sent to service.
+
+        While service shows a digest, new alerts are folded into it and the whole digest is sent
+        again under its tag, so repeats for its rooms replace it instead of stacking beside it.
+        """
+        shown = self._state.shown_digest(service)
+        if shown:
+            merged = {(alert.room.key, alert.key[2]): alert for alert in shown}
+            merged.update({(alert.room.key, alert.key[2]): alert for alert in alerts})
+            alerts = list(merged.values())
+        if len(alerts) == 1 and not shown:
+            message = alerts[0].line
+            title = alerts[0].room.title
+            tag = self._tag(alerts[0].room, alerts[0].key[2])
+            actions = self._action_buttons(alerts[0].room, service, None)
+        else:
+            message = "\n".join(f"{alert.room.name}: {alert.line}" for alert in alerts)
+            title = self._digest_title(alerts)
+            tag = self._tag()
+            actions = [button for alert in alerts for button in self._action_buttons(alert.room, service, alert.room.name)]
+        # A repeat send with the same tag replaces the notification on the phone instead of stacking a new one
+        return _Delivery(service, message, {"tag": tag, "actions": actions}, cooldowns,
+                         alerts if tag == self._tag() else None, title)
+
+    def _digest_title(self, alerts: List[_Alert]) -> str:
+        """Return the title the digest's rooms share, else the top-level messages.title, else the first room's."""
+        titles = {alert.room.title for alert in alerts}
+        if len(titles) == 1:
+            return titles.pop()
+        title = (self.args.get("messages") or {}).get("title")
+        return title if isinstance(title, str) and title.strip() else alerts[0].room.title
+
+    def _action_buttons(self, room: _Room, service: str, room_name: Optional[str]) -> List[Dict[str, str]]:
+        """Return the configured action buttons for room, naming the room in the titles if room_name is given."""
+        if room_name:
+            titles = {
+                "ignore": f"Ignore {room_name} today", "snooze": f"Snooze {room_name} {self.snooze_minutes} min",
+                "mute": f"Mute {room_name}", "acknowledge": f"Acknowledge {room_name}",
+            }
+        else:
+            titles = {
+                "ignore": "Ignore today", "snooze": f"Snooze {self.snooze_minutes} min",
+                "mute": "Mute room", "acknowledge": "Acknowledge",
+            }
+        return [{"action": f"{self.name}.{action}.{room.key}.{service}", "title": titles[action]} for action in self.actions]
+
+    def _deliver(self, deliveries: List[_Delivery]):
+        """Run notify calls concurrently on the worker pool and log their results in order.
+
+        Waits at most notify_timeout seconds in total; calls still running after that are
+        logged as pending and finish in the background.
+        """
+        deliveries = self._admit_deliveries(deliveries)
+        if not deliveries:
             return
+        futures = [(delivery, self._notify_pool.submit(self._call_notify, delivery)) for delivery in deliveries]
+        done, _ = wait([future for _, future in futures], timeout=self.notify_timeout)
+        self._log_deliveries(futures, done)
 
-        action_type, notify_service = action_parts[1], action_parts[2]
-        if action_type == "ignore":
-            try:
-                now = datetime.now()
-                tomorrow_start = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-                self._message_cooldowns[notify_service] = tomorrow_start.timestamp()
-                self.log(f"Ignore set for {notify_service} until tomorrow")
-            except Exception as e:
-                line_num = traceback.extract_tb(e.__traceback__)[-1].lineno
-                self.log(f"Failed to set ignore until tomorrow for {notify_service}: {e} (line {line_num})", level="ERROR")
+    def _admit_deliveries(self, deliveries: List[_Delivery]) -> List[_Delivery]:
+        """Mark deliveries in flight and return those their circuit breaker lets through; queue the rest."""
+        self._state.mark_in_flight(key for delivery in deliveries for key in delivery.cooldowns)
+        now = time.time()
+        allowed = []
+        for delivery in deliveries:
+            breaker = self._breakers[delivery.service]
+            if breaker.allow(now):
+                allowed.append(delivery)
+            elif breaker.park(delivery):
+                # Released by _delivery_finished once the probe's outcome is known
+                continue
+            else:
+                # Wait for the breaker's probe instead of spending an attempt on a dead service
+                self._queue_retry(delivery, due=breaker.retry_at)
+        return allowed
+
+    def _log_deliveries(self, futures: List[Tuple[_Delivery, Any]], done: set):
+        """Record finished calls in order and leave the still-pending ones to finish in the background."""
+        for delivery, future in futures:
+            if future in done:
+                self._delivery_finished(delivery, future)
+            else:
+                self.log(f"Notification to {delivery.service} still pending after {self.notify_timeout}s", level="WARNING")
+                future.add_done_callback(partial(self._delivery_finished, delivery))
+
+    def _call_notify(self, delivery: _Delivery) -> float:
+        """Call the notify service for one delivery and return its latency in seconds."""
+        started = time.monotonic()
+        self.call_service(f"notify/{delivery.service}", **self._notify_fields(delivery))
+        return time.monotonic() - started
+
+    @staticmethod
+    def _notify_fields(delivery: _Delivery) -> Dict[str, Any]:
+        """Return the notify service fields for delivery, adding its title if it has one."""
+        fields = {"message": delivery.message, "data": delivery.data}
+        if delivery.title:
+            fields["title"] = delivery.title
+        return fields
+
+    def _delivery_finished(self, delivery: _Delivery, future: Future):
+        """Record the outcome of a finished notify call, queueing a retry if it failed."""
+        breaker = self._breakers[delivery.service]
+        try:
+            latency = future.result()
+        except Exception as e:
+            line_num = traceback.extract_tb(e.__traceback__)[-1].lineno
+            self.log(f"Failed to send notification to {delivery.service}: {e} (line {line_num})", level="ERROR")
+            if breaker.record_failure(time.time()):
+                self.log(f"Circuit breaker for {delivery.service} opened for {self.breaker_config['reset_timeout']}s",
+                         level="WARNING")
+            self._queue_retry(delivery)
+        else:
+            if breaker.record_success():
+                self.log(f"Circuit breaker for {delivery.service} closed")
+            if delivery.message != CLEAR_NOTIFICATION:
+                # Remember where the tag is shown so the notification can be cleared once the condition resolves
+                self._state.add_posted(delivery.data["tag"], delivery.service)
+                if delivery.alerts:
+                    self._show_digest(delivery)
+            self._delivery_done(delivery)
+            self.delivery_latency[delivery.service] = latency
+            self.log(f"Notification sent to {delivery.service} ({latency:.2f}s)")
+        # Deliveries parked behind a probe go out once the breaker allows again: at once if the probe
+        # closed it, at the new retry_at if it re-opened it
+        for parked in breaker.take_parked():
+            self._queue_retry(parked, due=breaker.retry_at)
+
+    def _show_digest(self, delivery: _Delivery):
+        """Record a delivered digest and clear the per-room notifications of the rooms it now lists."""
+        self._state.show_digest(delivery.service, delivery.alerts)
+        clears = [
+            _Delivery(delivery.service, CLEAR_NOTIFICATION, {"tag": tag}, {})
+            for tag in sorted({self._tag(alert.room, alert.key[2]) for alert in delivery.alerts})
+            if self._state.discard_posted(tag, delivery.service)
+        ]
+        if clears:
+            self._deliver(clears)
+
+    def _delivery_done(self, delivery: _Delivery):
+        """Release a delivery's in-flight keys and start its cooldowns."""
+        self._state.release(delivery.cooldowns)
+        now = time.time()
+        for key, cooldown in delivery.cooldowns.items():
+            self._set_cooldown(key, now + cooldown)
+
+    def _queue_retry(self, delivery: _Delivery, due: Optional[float] = None):
+        """Queue a failed delivery with exponential backoff and jitter, or dead-letter it.
+
+        An explicit due time re-queues the delivery without counting an attempt. Its cooldown
+        keys stay in flight while it waits, so evaluations do not send it again.
+        """
+        if due is None:
+            delivery.attempts += 1
+            if delivery.attempts >= self.retry_config["max_attempts"]:
+                self._dead_letter(delivery, f"after {delivery.attempts} attempts")
+                return
+            delay = min(self.retry_config["max_delay"], self.retry_config["base_delay"] * 2 ** (delivery.attempts - 1))
+            due = time.time() + delay * (0.5 + random.random() / 2)
+        # An open breaker's retry_at may already have passed; never schedule in the past
+        due = max(due, time.time() + 1)
+        with self._retry_lock:
+            queue_full = len(self._retry_queue) >= self.retry_config["queue_size"]
+            if not queue_full:
+                heapq.heappush(self._retry_queue, (due, next(self._retry_sequence), delivery))
+                next_due = self._retry_queue[0][0]
+        if queue_full:
+            self._dead_letter(delivery, "because the retry queue is full")
+            return
+        self.log(f"Retrying notification to {delivery.service} in {due - time.time():.0f}s (attempt {delivery.attempts + 1})")
+        self._schedule("retry", self.run_at(self._process_retries, datetime.fromtimestamp(max(next_due, time.time() + 1))))
+
+    @property
+    def breaker_states(self) -> Dict[str, str]:
+        """Current circuit breaker state per notify service."""
+        return {service: breaker.state for service, breaker in self._breakers.items()}
+
+    def _dead_letter(self, delivery: _Delivery, reason: str):
+        """Give up on a delivery, logging it in full and starting its cooldown so it is not retried at once."""
+        self.log(f"Dead letter: giving up on notification to {delivery.service} {reason}: {delivery.message}", level="ERROR")
+        self._delivery_done(delivery)
+
+    def _process_retries(self, kwargs):
+        """Send every queued delivery that is due and schedule the next retry run."""
+        self._state.pop_timer("retry")
+        now = time.time()
+        due = []
+        with self._retry_lock:
+            while self._retry_queue and self._retry_queue[0][0] <= now:
+                due.append(heapq.heappop(self._retry_queue)[2])
+            next_due = self._retry_queue[0][0] if self._retry_queue else None
+        if next_due is not None:
+            self._schedule("retry", self.run_at(self._process_retries, datetime.fromtimestamp(max(next_due, time.time() + 1))))
+        self._deliver(due)
+
+    def _action_services(self, notify_service: str) -> List[str]:
+        """Return the persons' notify services an action applies to; a group action applies to everyone in it."""
+        return [person["notify"] for person in self.persons] if notify_service == self.notify_group else [notify_service]
+
+    def _silence(self, keys: List[Tuple[str, str, str]], expiry: float, action: str) -> bool:
+        """Block every key until expiry; return False (setting nothing) if a key is unknown.
+
+        Like cooldowns, these expiries live in the cooldown heap, so the planner's single wake-up
+        covers them and no timer is started per action.
+        """
+        if not self._state.knows(keys):
+            self.log(f"Ignoring action for unknown room or notify service: {action}", level="WARNING")
+            return False
+        # The new expiry replaces any acknowledgement of these keys
+        self._state.drop_acknowledged(keys)
+        for key in keys:
+            self._set_cooldown(key, expiry)
+        return True
+
+    def _handle_ignore_action(self, room_key: str, notify_service: str, action: str):
+        """Ignore both conditions of a room until tomorrow for the person (or group) that tapped "Ignore today"."""
+        try:
+            now = datetime.now()
+            tomorrow_start = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            keys = [(room_key, service, condition) for service in self._action_services(notify_service) for condition in CONDITIONS]
+            if self._silence(keys, tomorrow_start.timestamp(), action):
+                self.log(f"Ignore set for {notify_service} in {room_key} until tomorrow")
+        except Exception as e:
+            line_num = traceback.extract_tb(e.__traceback__)[-1].lineno
+            self.log(f"Failed to set ignore until tomorrow for {notify_service}: {e} (line {line_num})", level="ERROR")
+
+    def _handle_snooze_action(self, room_key: str, notify_service: str, action: str):
+        """Silence both conditions of a room for snooze_minutes for the person (or group) that tapped "Snooze"."""
+        keys = [(room_key, service, condition) for service in self._action_services(notify_service) for condition in CONDITIONS]
+        if self._silence(keys, time.time() + self.snooze_minutes * 60, action):
+            self.log(f"Snoozed {room_key} for {notify_service} for {self.snooze_minutes} minutes")
+
+    def _handle_mute_action(self, room_key: str, notify_service: str, action: str):
+        """Silence both conditions of a room for every person until tomorrow."""
+        tomorrow_start = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        keys = [(room_key, person["notify"], condition) for person in self.persons for condition in CONDITIONS]
+        if self._silence(keys, tomorrow_start.timestamp(), action):
+            self.log(f"Muted {room_key} for everyone until tomorrow (requested by {notify_service})")
+
+    def _handle_acknowledge_action(self, room_key: str, notify_service: str, action: str):
+        """Silence a room's current condition for the person (or group) that tapped "Acknowledge" until it resolves."""
+        room = next((room for room in self.rooms if room.key == room_key), None)
+        condition = room.active_condition if room else None
+        if not condition:
+            self.log(f"Nothing to acknowledge for {notify_service} in {room_key}")
+            return
+        keys = [(room_key, service, condition) for service in self._action_services(notify_service)]
+        # Lasts until the condition resolves, and at most until the time window ends
+        expiry = self._window_end().timestamp()
+        if self._silence(keys, expiry, action):
+            self._state.acknowledge(keys, expiry)
+            self.log(f"Acknowledged {condition} in {room_key} for {notify_service}")
+
+    def _release_acknowledged(self, room: _Room, condition: str):
+        """Lift the acknowledgements of a room's condition once it has resolved, unless another action replaced them."""
+        for key in self._state.release_acknowledged(room.key, condition):
+            if self._store:
+                self._store.put(key, 0)
+
+
+class AsyncTemperatureWindowNotification(TemperatureWindowNotification):
+    """Variant of TemperatureWindowNotification whose callbacks run as coroutines on AppDaemon's event loop.
+
+    Takes the same configuration and behaves the same, but state reads and notify calls are
+    awaited instead of holding a worker thread, and the notify calls of one pass run
+    concurrently on the loop rather than on the worker pool. Store flushes stay synchronous,
+    so SQLite I/O runs on a worker thread instead of blocking the loop.
+    """
+
+    async def _start_checks(self, kwargs):
+        """Start the check loop at the beginning of the when window."""
+        self._begin_checks()
+
+    async def _stop_checks(self, kwargs):
+        """Stop the check loop at the end of the when window."""
+        super()._stop_checks(kwargs)
+
+    async def _tick(self, kwargs):
+        """Run one scheduled check and schedule the next one."""
+        self._state.pop_timer("checks")
+        self._reschedule(await self._check_conditions(kwargs))
+
+    async def _handle_state_change(self, entity: str, attribute: str, old: Any, new: Any, kwargs):
+        """Re-evaluate only the rooms that depend on the entity that actually changed state."""
+        rooms = self._affected_rooms(entity, old, new)
+        if rooms:
+            self._reschedule(await self._check_conditions({}, rooms))
+
+    async def _handle_nowcast_change(self, entity: str, attribute: str, old: Any, new: Any, kwargs):
+        """Invalidate the shared precipitation cache when the nowcast state or forecast changes."""
+        if self._nowcast_revised(new) and self.mode == "event":
+            await self._handle_state_change(entity, attribute, old, new, kwargs)
+
+    async def _handle_presence_change(self, entity: str, attribute: str, old: Any, new: Any, kwargs):
+        """Keep the shared presence index current and, in event mode, re-evaluate rooms with pending alerts."""
+        _presence.update(entity, new)
+        if self.mode == "event":
+            await self._handle_state_change(entity, attribute, old, new, kwargs)
+
+    async def _take_snapshot(self) -> _StateSnapshot:
+        """Read the entities this app watches, one by one or, for many of them, in one read of the namespace."""
+        if len(self._watched_entities) > SNAPSHOT_ENTITY_READS:
+            states = await self.get_state(copy=False)
+        else:
+            entities = sorted(self._watched_entities)
+            results = await asyncio.gather(*(self.get_state(entity, attribute="all", copy=False) for entity in entities))
+            states = dict(zip(entities, results))
+        return _StateSnapshot(states, self._watched_entities)
+
+    async def _check_conditions(self, kwargs, rooms: Optional[Iterable[_Room]] = None) -> _StateSnapshot:
+        """Evaluate the given rooms (all rooms by default) against one state snapshot and return the snapshot."""
+        snapshot = await self._take_snapshot()
+        self._evaluate_rooms(snapshot, rooms)
+        return snapshot
+
+    async def _flush_digest(self, kwargs):
+        """Send one combined notification per person for every alert collected in the digest window."""
+        super()._flush_digest(kwargs)
+
+    async def _process_retries(self, kwargs):
+        """Send every queued delivery that is due and schedule the next retry run."""
+        super()._process_retries(kwargs)
+
+    def _schedule(self, name: str, handle: Any) -> Any:
+        """Record a timer handle under name; on the loop, run_* return a future that resolves to the handle."""
+        super()._schedule(name, handle)
+        if isinstance(handle, asyncio.Future):
+            handle.add_done_callback(partial(self._timer_registered, name))
+        return handle
+
+    def _timer_registered(self, name: str, future: asyncio.Future):
+        """Replace the future held under name by the timer handle it resolved to."""
+        handle = self._resolved_handle(future)
+        if handle is None:
+            self._state.pop_timer(name, future)
+        else:
+            self._state.replace_timer(name, future, handle)
+
+    def _cancel_handle(self, name: str, handle: Any):
+        """Cancel one scheduler handle, waiting for it first if it is still being registered."""
+        if isinstance(handle, asyncio.Future):
+            if not handle.done():
+                handle.add_done_callback(partial(self._cancel_registered, name))
+                return
+            handle = self._resolved_handle(handle)
+            if handle is None:
+                return
+        super()._cancel_handle(name, handle)
+
+    def _cancel_registered(self, name: str, future: asyncio.Future):
+        """Cancel a timer whose registration finished after it was cancelled."""
+        handle = self._resolved_handle(future)
+        if handle is not None:
+            super()._cancel_handle(name, handle)
+
+    @staticmethod
+    def _resolved_handle(future: asyncio.Future) -> Any:
+        """Return the timer handle a finished run_* future resolved to, or None if registering failed."""
+        if future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def _deliver(self, deliveries: List[_Delivery]):
+        """Admit deliveries at once, so later passes see them in flight, and send them from a task on the loop."""
+        deliveries = self._admit_deliveries(deliveries)
+        if deliveries:
+            asyncio.ensure_future(self._send_deliveries(deliveries))
+
+    async def _send_deliveries(self, deliveries: List[_Delivery]):
+        """Run notify calls concurrently and log their results in order.
+
+        Waits at most notify_timeout seconds in total; calls still running after that are
+        logged as pending and finish in the background.
+        """
+        futures = [(delivery, asyncio.ensure_future(self._call_notify_async(delivery))) for delivery in deliveries]
+        done, _ = await asyncio.wait([future for _, future in futures], timeout=self.notify_timeout)
+        self._log_deliveries(futures, done)
+
+    async def _call_notify_async(self, delivery: _Delivery) -> float:
+        """Call the notify service for one delivery and return its latency in seconds."""
+        started = time.monotonic()
+        await self.call_service(f"notify/{delivery.service}", **self._notify_fields(delivery))
+        return time.monotonic() - started
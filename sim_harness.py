@@ -0,0 +1,383 @@
+"""
+Offline simulation harness for i1_open_window.
+
+Runs TemperatureWindowNotification (or its async variant) without AppDaemon or Home
+Assistant. A fake hassapi.Hass serves get_state from an in-memory state table, runs timers
+on a virtual clock, and records every service call, timer registration and log line. Use it
+to measure notify call counts, timer leaks and latency of a scenario.
+
+The harness imports its own copy of i1_open_window against fake appdaemon modules, which are
+removed from sys.modules again afterwards, so a real AppDaemon installation is never touched.
+Use sim_harness.app_module to reach the simulated copy:
+
+    from sim_harness import Simulation
+
+    sim = Simulation(datetime(2024, 6, 1, 14, 0))
+    sim.set_state("sensor.bedroom_temperature", "24.5")
+    sim.set_state("binary_sensor.bedroom_window", "off")
+    app = sim.add_app("bedroom", config)
+    sim.advance(3600)
+    print(len(sim.service_calls), sim.peak_timers)
+
+Running the module directly plays a short sample scenario and prints its counters.
+"""
+
+import asyncio
+import importlib
+import itertools
+import sys
+import threading
+import types
+from datetime import datetime, time as dt_time, timedelta
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+
+class VirtualClock:
+    """Simulated wall clock that only moves when the simulation advances it."""
+
+    def __init__(self, start: datetime):
+        self._now = start.timestamp()
+
+    def time(self) -> float:
+        """Return the simulated time as a Unix timestamp."""
+        return self._now
+
+    def monotonic(self) -> float:
+        """Return the simulated time; it never goes backwards."""
+        return self._now
+
+    def set(self, timestamp: float):
+        """Move the clock forward to timestamp."""
+        self._now = max(self._now, timestamp)
+
+
+def _clock_datetime(clock: VirtualClock) -> type:
+    """Return a datetime subclass whose now() reads clock."""
+
+    class ClockDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.fromtimestamp(clock.time(), tz)
+
+    return ClockDatetime
+
+
+class _Timer:
+    """One timer registered through the fake scheduler."""
+
+    __slots__ = ("handle", "app", "kind", "callback", "due", "interval", "kwargs")
+
+    def __init__(self, handle: str, app: "Hass", kind: str, callback: Callable, due: float,
+                 interval: Optional[float], kwargs: Dict[str, Any]):
+        self.handle = handle
+        self.app = app
+        self.kind = kind
+        self.callback = callback
+        self.due = due
+        self.interval = interval
+        self.kwargs = kwargs
+
+
+class Hass:
+    """Stand-in for appdaemon.plugins.hass.hassapi.Hass backed by a Simulation."""
+
+    def __init__(self, simulation: "Simulation", name: str, args: Dict[str, Any]):
+        self.sim = simulation
+        self.name = name
+        self.args = args
+
+    def _result(self, value: Any) -> Any:
+        """Return value, or an awaitable resolving to it when called from the event loop like AppDaemon does."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return value
+        future = loop.create_future()
+        future.set_result(value)
+        return future
+
+    def log(self, msg: str, level: str = "INFO", **kwargs):
+        """Record a log line."""
+        self.sim.logs.append((self.sim.clock.time(), self.name, level, msg))
+        if self.sim.echo:
+            print(f"{datetime.fromtimestamp(self.sim.clock.time()):%H:%M:%S} {level} {self.name}: {msg}")
+
+    def get_state(self, entity_id: Optional[str] = None, attribute: Optional[str] = None, default: Any = None, **kwargs) -> Any:
+        """Return the whole state table, one entity's state dict ("all"), an attribute or the state."""
+        self.sim.reads += 1
+        with self.sim.lock:
+            if entity_id is None:
+                return self._result({entity: dict(state) for entity, state in self.sim.states.items()})
+            entity = self.sim.states.get(entity_id)
+        if entity is None:
+            return self._result(default)
+        if attribute == "all":
+            return self._result(dict(entity))
+        if attribute is not None:
+            return self._result(entity["attributes"].get(attribute, default))
+        return self._result(entity["state"])
+
+    def call_service(self, service: str, **kwargs) -> Any:
+        """Record a service call, failing it if the service is marked as failing."""
+        with self.sim.lock:
+            self.sim.service_calls.append((self.sim.clock.time(), self.name, service, kwargs))
+        if service in self.sim.failing:
+            raise RuntimeError(f"simulated failure of {service}")
+        return self._result(None)
+
+    def listen_state(self, callback: Callable, entity_id: Optional[str] = None, attribute: Optional[str] = None, **kwargs) -> str:
+        """Register a state listener; attribute "all" passes whole state dicts."""
+        handle = self.sim.new_handle("state")
+        self.sim.listeners[handle] = (self, "state", callback, entity_id, attribute, kwargs)
+        return self._result(handle)
+
+    def listen_event(self, callback: Callable, event: Optional[str] = None, **kwargs) -> str:
+        """Register an event listener."""
+        handle = self.sim.new_handle("event")
+        self.sim.listeners[handle] = (self, "event", callback, event, None, kwargs)
+        return self._result(handle)
+
+    def cancel_listen_state(self, handle: str):
+        """Remove a state listener."""
+        self.sim.listeners.pop(handle, None)
+        return self._result(None)
+
+    def cancel_listen_event(self, handle: str):
+        """Remove an event listener."""
+        self.sim.listeners.pop(handle, None)
+        return self._result(None)
+
+    def run_in(self, callback: Callable, delay: float, **kwargs) -> str:
+        """Run callback once after delay seconds."""
+        return self._result(self.sim.add_timer(self, "run_in", callback, self.sim.clock.time() + delay, None, kwargs))
+
+    def run_at(self, callback: Callable, start: datetime, **kwargs) -> str:
+        """Run callback once at start."""
+        return self._result(self.sim.add_timer(self, "run_at", callback, start.timestamp(), None, kwargs))
+
+    def run_every(self, callback: Callable, start: Any, interval: float, **kwargs) -> str:
+        """Run callback every interval seconds from start ("now" or a datetime)."""
+        due = self.sim.clock.time() if start == "now" else start.timestamp()
+        return self._result(self.sim.add_timer(self, "run_every", callback, due, interval, kwargs))
+
+    def run_daily(self, callback: Callable, start: Any, **kwargs) -> str:
+        """Run callback every day at the time of day of start (a datetime or time)."""
+        now = datetime.fromtimestamp(self.sim.clock.time())
+        time_of_day = start.time() if isinstance(start, datetime) else start
+        due = datetime.combine(now.date(), time_of_day)
+        if due <= now:
+            due += timedelta(days=1)
+        return self._result(self.sim.add_timer(self, "run_daily", callback, due.timestamp(), 86400, kwargs))
+
+    def cancel_timer(self, handle: str) -> Any:
+        """Cancel a timer; cancelling an unknown or finished timer is a no-op."""
+        self.sim.timers.pop(handle, None)
+        return self._result(None)
+
+    def timer_running(self, handle: str) -> bool:
+        """Return True if the timer is still scheduled."""
+        return self._result(handle in self.sim.timers)
+
+
+def import_app_module() -> types.ModuleType:
+    """Import i1_open_window against fake appdaemon modules and put back whatever sys.modules held before.
+
+    A real AppDaemon installation, and an i1_open_window already imported against it, are left
+    untouched; the harness then works on its own copy of the app module.
+    """
+    names = ["appdaemon", "appdaemon.plugins", "appdaemon.plugins.hass", "appdaemon.plugins.hass.hassapi"]
+    saved = {name: sys.modules.pop(name) for name in names + ["i1_open_window"] if name in sys.modules}
+    modules = [types.ModuleType(name) for name in names]
+    for parent, child, name in zip(modules, modules[1:], names[1:]):
+        setattr(parent, name.rsplit(".", 1)[1], child)
+    modules[-1].Hass = Hass
+    sys.modules.update(zip(names, modules))
+    try:
+        return importlib.import_module("i1_open_window")
+    finally:
+        for name in names:
+            del sys.modules[name]
+        sys.modules.update(saved)
+
+
+app_module = import_app_module()
+
+
+class Simulation:
+    """Virtual clock, state table and scheduler shared by the app instances of one scenario."""
+
+    def __init__(self, start: datetime, echo: bool = False, callback_delay: float = 0.001):
+        self.clock = VirtualClock(start)
+        self.echo = echo
+        # Timers fire this long after they fall due, like AppDaemon's scheduler; run_at also truncates
+        # times to whole microseconds, so firing exactly on time could land just before an app's deadline
+        self.callback_delay = callback_delay
+        self.lock = threading.RLock()
+        self.states: Dict[str, Dict[str, Any]] = {}
+        self.listeners: Dict[str, Tuple[Hass, str, Callable, Optional[str], Optional[str], Dict[str, Any]]] = {}
+        self.timers: Dict[str, _Timer] = {}
+        self.apps: Dict[str, Any] = {}
+        # Recordings: (time, app, service, kwargs) per service call, (time, app, kind, callback name) per timer
+        self.service_calls: List[Tuple[float, str, str, Dict[str, Any]]] = []
+        self.timer_registrations: List[Tuple[float, str, str, str]] = []
+        self.logs: List[Tuple[float, str, str, str]] = []
+        self.reads = 0
+        self.peak_timers = 0
+        self.failing: set = set()
+        self._handles = itertools.count(1)
+        self._loop = asyncio.new_event_loop()
+        self._reset_module()
+
+    def _reset_module(self):
+        """Point the app module at the virtual clock and give it fresh process-wide registries."""
+        app_module.time = types.SimpleNamespace(time=self.clock.time, monotonic=self.clock.monotonic)
+        app_module.datetime = _clock_datetime(self.clock)
+        app_module._nowcast_evaluators.clear()
+        app_module._presence = app_module._PresenceIndex()
+        app_module._actions = app_module._ActionRouter()
+
+    def new_handle(self, prefix: str) -> str:
+        """Return a fresh handle for a timer or listener."""
+        return f"{prefix}-{next(self._handles)}"
+
+    def add_timer(self, app: Hass, kind: str, callback: Callable, due: float, interval: Optional[float],
+                  kwargs: Dict[str, Any]) -> str:
+        """Register a timer and record the registration."""
+        handle = self.new_handle("timer")
+        with self.lock:
+            self.timers[handle] = _Timer(handle, app, kind, callback, due, interval, kwargs)
+            self.timer_registrations.append((self.clock.time(), app.name, kind, callback.__name__))
+            self.peak_timers = max(self.peak_timers, len(self.timers))
+        return handle
+
+    def add_app(self, name: str, args: Dict[str, Any], cls: Optional[type] = None) -> Any:
+        """Create an app instance (TemperatureWindowNotification by default) and run its initialize."""
+        app = (cls or app_module.TemperatureWindowNotification)(self, name, args)
+        self.apps[name] = app
+        self._invoke(app.initialize)
+        return app
+
+    def terminate(self, name: str):
+        """Stop an app the way AppDaemon does: run terminate, then drop its timers and listeners."""
+        app = self.apps.pop(name)
+        self._invoke(app.terminate)
+        for handle in [handle for handle, timer in self.timers.items() if timer.app is app]:
+            del self.timers[handle]
+        for handle in [handle for handle, listener in self.listeners.items() if listener[0] is app]:
+            del self.listeners[handle]
+
+    def close(self):
+        """Terminate every remaining app and close the event loop used for async callbacks."""
+        for name in list(self.apps):
+            self.terminate(name)
+        self._loop.close()
+
+    def set_state(self, entity_id: str, state: Any, **attributes):
+        """Set an entity's state and attributes and fire the matching state listeners."""
+        with self.lock:
+            old = self.states.get(entity_id)
+            new = {"entity_id": entity_id, "state": state, "attributes": attributes or (old or {}).get("attributes", {})}
+            self.states[entity_id] = new
+        for app, kind, callback, entity, attribute, kwargs in list(self.listeners.values()):
+            if kind != "state" or entity not in (None, entity_id):
+                continue
+            if attribute == "all":
+                old_value, new_value = old, new
+            elif attribute is not None:
+                old_value, new_value = (old or {}).get("attributes", {}).get(attribute), attributes.get(attribute)
+            else:
+                old_value, new_value = (old or {}).get("state"), state
+            if attribute is None and old_value == new_value:
+                continue
+            self._invoke(callback, entity_id, attribute or "state", old_value, new_value, kwargs)
+
+    def fire_event(self, event: str, **data):
+        """Fire an event to the matching event listeners."""
+        for app, kind, callback, name, _, kwargs in list(self.listeners.values()):
+            if kind == "event" and name in (None, event):
+                self._invoke(callback, event, data, kwargs)
+
+    def advance(self, seconds: float):
+        """Move the clock forward, running every timer that falls due in order."""
+        target = self.clock.time() + seconds
+        while True:
+            with self.lock:
+                due = [timer for timer in self.timers.values() if timer.due + self.callback_delay <= target]
+                if not due:
+                    break
+                timer = min(due, key=lambda t: t.due)
+                fire_at = timer.due
+                if timer.interval is None:
+                    del self.timers[timer.handle]
+                else:
+                    timer.due += timer.interval
+            self.clock.set(fire_at + self.callback_delay)
+            self._invoke(timer.callback, dict(timer.kwargs))
+        self.clock.set(target)
+
+    def _invoke(self, callback: Callable, *args):
+        """Call a callback, running coroutine callbacks and the tasks they start to completion."""
+        if not asyncio.iscoroutinefunction(callback):
+            callback(*args)
+            return
+        self._loop.run_until_complete(callback(*args))
+        while True:
+            pending = [task for task in asyncio.all_tasks(self._loop) if not task.done()]
+            if not pending:
+                break
+            self._loop.run_until_complete(asyncio.wait(pending))
+
+    def calls_to(self, service: str) -> List[Dict[str, Any]]:
+        """Return the arguments of every recorded call to service."""
+        return [kwargs for _, _, called, kwargs in self.service_calls if called == service]
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the scenario's counters."""
+        return {
+            "service_calls": len(self.service_calls),
+            "state_reads": self.reads,
+            "timer_registrations": len(self.timer_registrations),
+            "timers_held": len(self.timers),
+            "peak_timers": self.peak_timers,
+            "errors": sum(1 for _, _, level, _ in self.logs if level == "ERROR"),
+        }
+
+
+def main():
+    """Play a sample evening with two rooms and print the scenario's counters."""
+    config = {
+        "persons": [{"name": "Alex", "notify": "mobile_app_alex", "tracker": "person.alex"}],
+        "when": {"after": 15, "before": 22},
+        "temperature": {"below": 16, "above": 22},
+        "window": {"below": "off", "above": "on"},
+        "messages": {"title": "Room temp", "cooldown": 1800},
+        "rooms": [
+            {"name": "Bedroom", "temperature": {"sensor": "sensor.bedroom_temperature"},
+             "window": {"sensor": "binary_sensor.bedroom_window"},
+             "messages": {"below": "Close bedroom window", "above": "Open bedroom window"}},
+            {"name": "Kitchen", "temperature": {"sensor": "sensor.kitchen_temperature"},
+             "window": {"sensor": "binary_sensor.kitchen_window"},
+             "messages": {"below": "Close kitchen window", "above": "Open kitchen window"}},
+        ],
+        "mode": "event",
+        "store": False,
+    }
+    sim = Simulation(datetime.combine(datetime.now().date(), dt_time(14, 0)), echo=True)
+    sim.set_state("person.alex", "home")
+    sim.set_state("sensor.bedroom_temperature", "21.0")
+    sim.set_state("sensor.kitchen_temperature", "19.0")
+    sim.set_state("binary_sensor.bedroom_window", "off")
+    sim.set_state("binary_sensor.kitchen_window", "off")
+    sim.add_app("household", config)
+    sim.advance(3600)
+    for step in range(12):
+        sim.set_state("sensor.bedroom_temperature", f"{21.0 + step * 0.25:.2f}")
+        sim.advance(600)
+    sim.set_state("binary_sensor.bedroom_window", "on")
+    sim.advance(4 * 3600)
+    for key, value in sim.summary().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
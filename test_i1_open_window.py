@@ -0,0 +1,353 @@
+"""
+Tests for i1_open_window, driven by the offline simulation harness.
+
+Run with python -m unittest (or pytest) from the repository root.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
+
+from sim_harness import Simulation, app_module
+
+NOTIFY = "mobile_app_alex"
+ACTION_EVENT = "mobile_app_notification_action"
+
+
+def make_config(**overrides):
+    """Return a one-room, one-person configuration whose room alerts while its window is closed."""
+    config = {
+        "persons": [{"name": "Alex", "notify": NOTIFY}],
+        "temperature": {"sensor": "sensor.bedroom_temperature", "below": 16, "above": 20},
+        "window": {"sensor": "binary_sensor.bedroom_window", "below": "off", "above": "on"},
+        "messages": {"below": "Close the window", "above": "Open the window", "title": "Bedroom", "cooldown": 1800},
+        "when": {"after": 15, "before": 22},
+        "store": False,
+        "mode": "event",
+    }
+    config.update(overrides)
+    return config
+
+
+def notify_calls(sim):
+    """Return the messages of every notify call, in order."""
+    return [kwargs["message"] for kwargs in sim.calls_to(f"notify/{NOTIFY}")]
+
+
+class TestRegressions(unittest.TestCase):
+    """Scenarios that once misbehaved and must keep working."""
+
+    def setUp(self):
+        self.sim = Simulation(datetime(2024, 6, 1, 16, 0))
+        self.sim.set_state("sensor.bedroom_temperature", "25")
+        self.sim.set_state("binary_sensor.bedroom_window", "off")
+
+    def tearDown(self):
+        self.sim.close()
+
+    def test_retry_recovers_without_spinning(self):
+        self.sim.failing.add(f"notify/{NOTIFY}")
+        self.sim.add_app("bedroom", make_config(
+            retry={"max_attempts": 10, "base_delay": 30},
+            circuit_breaker={"failure_threshold": 2, "reset_timeout": 120},
+        ))
+        self.sim.advance(600)
+        failed = len(notify_calls(self.sim))
+        self.assertLess(failed, 10)
+        self.sim.failing.clear()
+        self.sim.advance(900)
+        self.assertEqual(notify_calls(self.sim)[failed:], ["Open the window (25.0°C)"])
+        self.assertEqual(self.sim.summary()["timers_held"], 3)
+
+    def test_delivery_parked_behind_probe_is_retried_after_it(self):
+        self.sim.set_state("sensor.bedroom_temperature", "18")
+        app = self.sim.add_app("bedroom", make_config())
+        breaker = app._breakers[NOTIFY]
+        breaker.record_failure(self.sim.clock.time() - 600)
+        breaker.record_failure(self.sim.clock.time() - 600)
+        breaker.record_failure(self.sim.clock.time() - 600)
+        self.assertTrue(breaker.allow(self.sim.clock.time()))
+        probe = app_module._Delivery(NOTIFY, "Probe", {"tag": "bedroom.probe"}, {})
+        parked = app_module._Delivery(NOTIFY, "Parked", {"tag": "bedroom.parked"}, {})
+
+        app._deliver([parked])
+        self.assertEqual(notify_calls(self.sim), [])
+        self.assertIsNone(app._state.get_timer("retry"))
+
+        finished = Future()
+        finished.set_result(0.1)
+        app._delivery_finished(probe, finished)
+        self.assertEqual(breaker.state, breaker.CLOSED)
+        self.assertGreater(self.sim.timers[app._state.get_timer("retry")].due, self.sim.clock.time())
+        self.sim.advance(5)
+        self.assertEqual(notify_calls(self.sim), ["Parked"])
+
+    def test_acknowledge_does_not_undo_later_ignore(self):
+        self.sim.add_app("bedroom", make_config(actions=["ignore", "acknowledge"]))
+        self.sim.advance(5)
+        self.sim.fire_event(ACTION_EVENT, action=f"bedroom.acknowledge.bedroom.{NOTIFY}")
+        self.sim.fire_event(ACTION_EVENT, action=f"bedroom.ignore.bedroom.{NOTIFY}")
+        # The condition resolves and returns; the ignore still holds for the rest of the day
+        self.sim.set_state("binary_sensor.bedroom_window", "on")
+        self.sim.advance(5)
+        self.sim.set_state("binary_sensor.bedroom_window", "off")
+        self.sim.advance(3600)
+        self.assertEqual(notify_calls(self.sim), ["Open the window (25.0°C)", "clear_notification"])
+
+    def test_concurrent_passes_do_not_clear_an_active_alert(self):
+        app = self.sim.add_app("bedroom", make_config())
+        for _ in range(50):
+            threads = [threading.Thread(target=app._check_conditions, args=({},)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertNotIn("clear_notification", notify_calls(self.sim))
+        self.assertEqual(notify_calls(self.sim), ["Open the window (25.0°C)"])
+
+    def test_nowcast_revision_rechecks_every_instance(self):
+        self.sim.set_state("sensor.nowcast", "1.0", forecast=[])
+        for name in ("bedroom", "office"):
+            self.sim.set_state(f"sensor.{name}_temperature", "25")
+            self.sim.set_state(f"binary_sensor.{name}_window", "off")
+            self.sim.add_app(name, make_config(
+                temperature={"sensor": f"sensor.{name}_temperature", "below": 16, "above": 20},
+                window={"sensor": f"binary_sensor.{name}_window", "below": "off", "above": "on"},
+                nowcast_sensor="sensor.nowcast",
+            ))
+        self.sim.advance(5)
+        self.assertEqual(notify_calls(self.sim), [])
+        self.sim.set_state("sensor.nowcast", "0.0", forecast=[])
+        self.sim.advance(5)
+        self.assertEqual(sorted(app for _, app, _, _ in self.sim.service_calls), ["bedroom", "office"])
+
+    def test_rain_clearing_releases_room_without_polling(self):
+        start = datetime.fromtimestamp(self.sim.clock.time())
+        forecast = [
+            {"datetime": (start + timedelta(seconds=100 + 300 * i)).isoformat(), "precipitation": 1.0 if i == 0 else 0.0}
+            for i in range(12)
+        ]
+        self.sim.set_state("sensor.nowcast", "0.0", forecast=forecast)
+        config = make_config(nowcast_sensor="sensor.nowcast")
+        del config["mode"]
+        self.sim.add_app("bedroom", config)
+        self.sim.advance(600)
+        # Released right after the wet slot passes, not when the cached "rain expected" result times out
+        self.assertEqual(notify_calls(self.sim), ["Open the window (25.0°C)"])
+        self.assertLess(self.sim.service_calls[0][0], start.timestamp() + 110)
+        self.assertLess(len([registration for registration in self.sim.timer_registrations if registration[3] == "_tick"]), 10)
+
+    def test_alert_resolved_inside_digest_window_is_not_sent(self):
+        app = self.sim.add_app("bedroom", make_config(digest_window=10))
+        self.sim.advance(2)
+        self.sim.set_state("binary_sensor.bedroom_window", "on")
+        self.sim.advance(20)
+        self.assertEqual(notify_calls(self.sim), [])
+        self.assertFalse(app._state.is_posted("bedroom.bedroom.above"))
+        # Its key was released, so the condition alerts again as soon as it returns
+        self.sim.set_state("binary_sensor.bedroom_window", "off")
+        self.sim.advance(20)
+        self.assertEqual(notify_calls(self.sim), ["Open the window (25.0°C)"])
+
+    def test_steady_room_past_threshold_is_not_polled_at_minimum(self):
+        self.sim.set_state("sensor.bedroom_temperature", "14")
+        config = make_config()
+        del config["mode"]
+        self.sim.add_app("bedroom", config)
+        self.sim.advance(7 * 3600)
+        self.assertEqual(notify_calls(self.sim), [])
+        # A cold room with its window closed needs no more than the max interval (default 600 s)
+        ticks = [registration for registration in self.sim.timer_registrations if registration[3] == "_tick"]
+        self.assertLessEqual(len(ticks), 7 * 3600 // 600 + 2)
+
+    def test_snapshot_reads_only_watched_entities(self):
+        self.sim.set_state("sensor.unrelated", "1")
+        app = self.sim.add_app("bedroom", make_config())
+        reads = []
+        get_state = app.get_state
+        app.get_state = lambda entity_id=None, **kwargs: reads.append((entity_id, kwargs)) or get_state(entity_id, **kwargs)
+        snapshot = app._take_snapshot()
+        self.assertEqual(sorted(entity for entity, _ in reads), ["binary_sensor.bedroom_window", "sensor.bedroom_temperature"])
+        self.assertTrue(all(kwargs == {"attribute": "all", "copy": False} for _, kwargs in reads))
+        self.assertEqual(snapshot.state("sensor.bedroom_temperature"), "25")
+
+    def test_notification_carries_room_title(self):
+        self.sim.add_app("bedroom", make_config())
+        self.sim.advance(5)
+        self.assertEqual([kwargs.get("title") for kwargs in self.sim.calls_to(f"notify/{NOTIFY}")], ["Bedroom"])
+
+    def test_digest_drops_resolved_room(self):
+        rooms = [
+            {
+                "name": name,
+                "temperature": {"sensor": f"sensor.{name}_temperature"},
+                "window": {"sensor": f"binary_sensor.{name}_window"},
+                "messages": {"below": f"Close {name}", "above": f"Open {name}"},
+            }
+            for name in ("bedroom", "office")
+        ]
+        config = make_config(
+            rooms=rooms,
+            digest_window=10,
+            temperature={"below": 16, "above": 20},
+            window={"below": "off", "above": "on"},
+            messages={"title": "Home", "cooldown": 1800},
+        )
+        self.sim.set_state("sensor.office_temperature", "25")
+        self.sim.set_state("binary_sensor.office_window", "off")
+        self.sim.add_app("home", config)
+        self.sim.advance(20)
+        self.sim.set_state("binary_sensor.bedroom_window", "on")
+        self.sim.advance(3600)
+        tags = [kwargs["data"]["tag"] for kwargs in self.sim.calls_to(f"notify/{NOTIFY}")]
+        self.assertEqual(set(tags), {"home.digest"})
+        self.assertEqual(self.sim.calls_to(f"notify/{NOTIFY}")[0]["title"], "Home")
+        self.assertEqual(notify_calls(self.sim)[:2], [
+            "bedroom: Open bedroom (25.0°C)\noffice: Open office (25.0°C)",
+            "office: Open office (25.0°C)",
+        ])
+
+
+class TestNowcastTimeline(unittest.TestCase):
+    """Forecast parsing and wet-slot lookups."""
+
+    def setUp(self):
+        # Run in a zone away from UTC, so naive times taken as UTC would land on the wrong slot
+        self.tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Europe/Oslo"
+        time.tzset()
+
+    def tearDown(self):
+        if self.tz is None:
+            del os.environ["TZ"]
+        else:
+            os.environ["TZ"] = self.tz
+        time.tzset()
+
+    def test_aware_and_naive_timestamps(self):
+        timeline = app_module._NowcastTimeline([
+            {"datetime": "2024-06-01T14:00:00Z", "precipitation": 0.0},
+            {"datetime": "2024-06-01T16:05:00+02:00", "precipitation": 0.5},
+            {"datetime": "2024-06-01T14:10:00", "precipitation": 0.0},
+            {"datetime": "not a time", "precipitation": 1.0},
+        ])
+        utc = datetime(2024, 6, 1, 14, 0, tzinfo=timezone.utc).timestamp()
+        # Aware timestamps keep their offset; naive ones are local time
+        self.assertEqual(sorted(timeline.times), sorted([utc, utc + 300, datetime(2024, 6, 1, 14, 10).timestamp()]))
+        self.assertTrue(timeline.wet_between(utc, utc + 300))
+        self.assertFalse(timeline.wet_between(utc + 301, utc + 900))
+
+    def test_clear_at_and_next_wet_after(self):
+        start = datetime(2024, 6, 1, 14, 0).timestamp()
+        timeline = app_module._NowcastTimeline([
+            {"datetime": datetime.fromtimestamp(start + 300 * i).isoformat(), "precipitation": 1.0 if i in (1, 2) else 0.0}
+            for i in range(12)
+        ])
+        self.assertEqual(timeline.clear_at(start, 600), start + 601)
+        self.assertEqual(timeline.next_wet_after(start), start + 300)
+        self.assertIsNone(timeline.next_wet_after(start + 600))
+
+
+class TestExpiryHeap(unittest.TestCase):
+    """Bounded expiry bookkeeping behind cooldowns and ignores."""
+
+    def test_rejects_unknown_keys(self):
+        heap = app_module._ExpiryHeap([("bedroom", NOTIFY, "above")])
+        self.assertFalse(heap.set(("kitchen", NOTIFY, "above"), 100.0))
+        self.assertTrue(heap.set(("bedroom", NOTIFY, "above"), 100.0))
+        self.assertEqual(len(heap), 1)
+
+    def test_evicts_expired_and_superseded_entries(self):
+        keys = [("bedroom", NOTIFY, "above"), ("bedroom", NOTIFY, "below")]
+        heap = app_module._ExpiryHeap(keys)
+        heap.set(keys[0], 100.0)
+        heap.set(keys[0], 300.0)
+        heap.set(keys[1], 200.0)
+        self.assertEqual(heap.next_expiry(0.0), 200.0)
+        self.assertEqual(heap.next_expiry(250.0), 300.0)
+        self.assertEqual(len(heap), 1)
+        self.assertIsNone(heap.next_expiry(300.0))
+        self.assertEqual(heap.get(keys[0]), 0.0)
+
+
+class TestApps(unittest.TestCase):
+    """Behaviour of whole app instances under the harness."""
+
+    def setUp(self):
+        self.sim = Simulation(datetime(2024, 6, 1, 16, 0))
+        self.sim.set_state("sensor.bedroom_temperature", "25")
+        self.sim.set_state("binary_sensor.bedroom_window", "off")
+
+    def tearDown(self):
+        self.sim.close()
+
+    def test_store_keeps_cooldowns_across_reload(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = make_config(store={"path": os.path.join(directory, "expiries.sqlite")})
+            self.sim.add_app("bedroom", config)
+            self.sim.advance(5)
+            self.sim.terminate("bedroom")
+            self.assertEqual(len(notify_calls(self.sim)), 1)
+
+            # The reloaded app picks the cooldown up from the file instead of alerting again at once
+            self.sim.add_app("bedroom", config)
+            self.sim.advance(600)
+            self.assertEqual(len(notify_calls(self.sim)), 1)
+            self.sim.advance(1800)
+            self.assertEqual(len(notify_calls(self.sim)), 2)
+            self.sim.terminate("bedroom")
+
+    def test_action_for_unknown_service_is_rejected(self):
+        self.sim.add_app("bedroom", make_config(actions=["ignore"]))
+        self.sim.fire_event(ACTION_EVENT, action="bedroom.ignore.bedroom.mobile_app_stranger")
+        self.assertTrue(any("unknown notify service" in line for _, _, level, line in self.sim.logs if level == "WARNING"))
+        self.sim.advance(5)
+        self.assertEqual(notify_calls(self.sim), ["Open the window (25.0°C)"])
+
+    def test_action_subscription_moves_to_another_app(self):
+        self.sim.set_state("sensor.office_temperature", "25")
+        self.sim.set_state("binary_sensor.office_window", "off")
+        self.sim.add_app("bedroom", make_config(actions=["ignore"]))
+        self.sim.add_app("office", make_config(
+            actions=["ignore"],
+            temperature={"sensor": "sensor.office_temperature", "below": 16, "above": 20},
+            window={"sensor": "binary_sensor.office_window", "below": "off", "above": "on"},
+        ))
+        subscribers = lambda: [listener[0].name for listener in self.sim.listeners.values() if listener[1] == "event"]
+        self.assertEqual(subscribers(), ["bedroom"])
+        self.sim.terminate("bedroom")
+        self.assertEqual(subscribers(), ["office"])
+
+        self.sim.fire_event(ACTION_EVENT, action=f"office.ignore.office.{NOTIFY}")
+        self.assertTrue(any(app == "office" and line.startswith("Ignore set") for _, app, _, line in self.sim.logs))
+
+    def group_config(self):
+        return make_config(
+            persons=[
+                {"name": "Alex", "notify": NOTIFY, "tracker": "person.alex"},
+                {"name": "Sam", "notify": "mobile_app_sam", "tracker": "person.sam"},
+            ],
+            notify_group="family",
+        )
+
+    def test_notify_group_collapses_identical_alerts(self):
+        self.sim.set_state("person.alex", "home")
+        self.sim.set_state("person.sam", "home")
+        self.sim.add_app("bedroom", self.group_config())
+        self.sim.advance(5)
+        self.assertEqual([call[2] for call in self.sim.service_calls], ["notify/family"])
+
+    def test_notify_group_falls_back_to_eligible_persons(self):
+        self.sim.set_state("person.alex", "home")
+        self.sim.set_state("person.sam", "not_home")
+        self.sim.add_app("bedroom", self.group_config())
+        self.sim.advance(5)
+        self.assertEqual([call[2] for call in self.sim.service_calls], [f"notify/{NOTIFY}"])
+
+
+if __name__ == "__main__":
+    unittest.main()